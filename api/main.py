@@ -0,0 +1,298 @@
+"""Async HTTP API in front of the question, learning path, slide and narration generators.
+
+Several Streamlit replicas can point SENSAI_API_URL at one instance and share its
+warm caches. Run with: uvicorn api.main:app --host 0.0.0.0 --port 8000
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.staticfiles import StaticFiles
+from pydantic import BaseModel
+
+from src.services.audio_store import get_audio_store
+from src.services.metrics import registry
+from src.services.narration import NarrationStream
+from src.services.path_generator import generate_personalized_path, path_profile
+from src.services.question_bank import QuestionBank
+from src.services.response_cache import get_response_cache
+from src.services.slide_generator import generate_slide_content
+
+load_dotenv()
+
+# Concurrent generations per endpoint; the rest wait, up to MAX_WAITING per endpoint
+CONCURRENCY = {
+    "questions": int(os.getenv("SENSAI_API_QUESTION_CONCURRENCY", "8")),
+    "learning_path": int(os.getenv("SENSAI_API_PATH_CONCURRENCY", "8")),
+    "slides": int(os.getenv("SENSAI_API_SLIDE_CONCURRENCY", "16")),
+    "narration": int(os.getenv("SENSAI_API_NARRATION_CONCURRENCY", "8")),
+}
+MAX_WAITING = int(os.getenv("SENSAI_API_MAX_WAITING", "64"))
+
+# One thread per generation slot, so the endpoint limits and not the default executor's size bound concurrency
+_executor = ThreadPoolExecutor(max_workers=sum(CONCURRENCY.values()), thread_name_prefix="generation")
+
+RESULT_CACHE_SIZE = 2048
+RESULT_CACHE_TTL = 3600
+
+# Where browsers can reach this service; narration URLs are handed to the UI's audio player
+PUBLIC_URL = os.getenv("SENSAI_API_PUBLIC_URL", "http://localhost:8000").rstrip("/")
+
+
+class ResultCache:
+    """In-memory LRU of recent results with a TTL, in front of the persistent response cache"""
+
+    def __init__(self, max_entries=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class Generator:
+    """Runs one kind of blocking generation off the event loop with coalescing and a concurrency limit.
+
+    Concurrent requests for the same key await a single generation, finished
+    results are served from the result cache, and at most ``limit`` generations
+    run at once with at most MAX_WAITING more queued behind them.
+    """
+
+    def __init__(self, name, function, limit):
+        self.name = name
+        self.function = function
+        self.limit = limit
+        self.cache = ResultCache()
+        self.running = 0
+        self._semaphore = asyncio.Semaphore(limit)
+        self._in_flight = {}
+        self.coalesced = 0
+
+    async def __call__(self, key, *args, cache=True):
+        if cache:
+            result = self.cache.get(key)
+            if result is not None:
+                return result
+        # Shield the shared task so one client disconnecting does not cancel it for the others
+        return await asyncio.shield(self.start(key, *args, cache=cache))
+
+    def start(self, key, *args, cache=True):
+        """Start the generation for ``key``, or join the one in flight, and return its task"""
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task
+        if self.waiting >= MAX_WAITING:
+            raise HTTPException(status_code=429, detail=f"Too many pending {self.name} requests")
+        task = asyncio.ensure_future(self._run(key, args, cache))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return task
+
+    @property
+    def waiting(self):
+        """Generations queued behind the concurrency limit"""
+        return len(self._in_flight) - self.running
+
+    async def _run(self, key, args, cache):
+        await self._semaphore.acquire()
+        self.running += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                _executor, contextvars.copy_context().run, self.function, *args
+            )
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+        if cache:
+            self.cache.set(key, result)
+        return result
+
+    def stats(self):
+        return {
+            "limit": self.limit,
+            "running": self.running,
+            "waiting": self.waiting,
+            "in_flight": len(self._in_flight),
+            "coalesced": self.coalesced,
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+        }
+
+
+# Question banks still being generated, by topic, so every stream for a topic follows one generation
+_question_banks = {}
+_question_banks_lock = threading.Lock()
+
+
+def question_bank(topic):
+    """Start (or join) generation of the bank for ``topic``; finished banks come from the bank cache"""
+    with _question_banks_lock:
+        # Drop finished banks; complete ones are served from the bank cache from now on
+        for finished in [key for key, pending in _question_banks.items() if pending.done]:
+            del _question_banks[finished]
+        bank = _question_banks.get(topic)
+        if bank is None:
+            if len(_question_banks) >= CONCURRENCY["questions"] + MAX_WAITING:
+                raise HTTPException(status_code=429, detail="Too many pending questions requests")
+            bank = _question_banks[topic] = QuestionBank(topic)
+    return bank
+
+
+async def question_lines(bank):
+    """The bank's items as NDJSON lines, each sent as soon as it has been generated"""
+    loop = asyncio.get_running_loop()
+    sent = 0
+    while True:
+        if not await loop.run_in_executor(_executor, bank.wait_for, sent + 1, bank.item_timeout()):
+            bank.fall_back()
+        # Read done first: once it is set the snapshot holds every item
+        done = bank.done
+        items = bank.snapshot()
+        for item in items[sent:]:
+            yield json.dumps(item) + "\n"
+        sent = len(items)
+        if done:
+            return
+
+
+# Narration still being synthesized, by content hash, so every request for it shares one stream
+_narrations = {}
+_narrations_lock = threading.Lock()
+
+
+def narration(markdown):
+    """Start (or join) synthesis and return the chunk URLs, plus the full clip once it exists"""
+    key = hashlib.sha256(markdown.encode("utf-8")).hexdigest()
+    with _narrations_lock:
+        stream = _narrations.get(key)
+        if stream is None:
+            stream = _narrations[key] = NarrationStream(markdown)
+
+    # Chunk URLs are known up front; the player retries a chunk until it has been written
+    clip_url = stream.clip_url()
+    if clip_url is not None or stream.done:
+        with _narrations_lock:
+            _narrations.pop(key, None)
+    return {
+        "chunk_urls": [audio_url(chunk_key) for chunk_key in stream.keys],
+        "clip_url": audio_url(stream.clip_key) if clip_url else None,
+    }
+
+
+def audio_url(key):
+    return f"{PUBLIC_URL}/audio/{key}.{get_audio_store().extension}"
+
+
+class QuestionsRequest(BaseModel):
+    topic: str
+
+
+class LearningPathRequest(BaseModel):
+    topic: str
+    questions: list[str]
+    answers: list[bool]
+    level: float | None = None
+
+
+class SlideRequest(BaseModel):
+    topic: str
+    subtopic: str
+
+
+class NarrationRequest(BaseModel):
+    markdown: str
+
+
+app = FastAPI(title="sensAI generation API")
+app.mount("/audio", StaticFiles(directory=get_audio_store().root), name="audio")
+
+generators = {
+    "learning_path": Generator("learning_path", generate_personalized_path, CONCURRENCY["learning_path"]),
+    "slides": Generator("slides", generate_slide_content, CONCURRENCY["slides"]),
+    "narration": Generator("narration", narration, CONCURRENCY["narration"]),
+}
+
+
+@app.post("/questions")
+async def questions(request: QuestionsRequest):
+    """Stream the topic's question bank as NDJSON, one item per line"""
+    return StreamingResponse(question_lines(question_bank(request.topic)), media_type="application/x-ndjson")
+
+
+@app.post("/learning-path")
+async def learning_path(request: LearningPathRequest):
+    key = path_profile(request.topic, request.questions, request.answers, request.level)
+    path = await generators["learning_path"](
+        key, request.topic, request.questions, request.answers, request.level
+    )
+    return {"topics": path}
+
+
+@app.post("/learning-path/prefetch", status_code=202)
+async def prefetch_learning_path(request: LearningPathRequest):
+    """Start generating a path a quiz may still end with; the final request joins it or hits the cache"""
+    key = path_profile(request.topic, request.questions, request.answers, request.level)
+    generator = generators["learning_path"]
+    if generator.cache.get(key) is None:
+        task = generator.start(key, request.topic, request.questions, request.answers, request.level)
+        # Nobody awaits a prefetch, so retrieve its error to keep it from being reported as unhandled
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+    return {"status": "accepted"}
+
+
+@app.post("/slides")
+async def slides(request: SlideRequest):
+    content = await generators["slides"]((request.topic, request.subtopic), request.topic, request.subtopic)
+    return {"markdown": content}
+
+
+@app.post("/narration")
+async def narrate(request: NarrationRequest):
+    # Not result-cached: the response changes once the full clip is ready
+    return await generators["narration"](request.markdown, request.markdown, cache=False)
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/stats")
+async def stats():
+    return {
+        "generators": {name: generator.stats() for name, generator in generators.items()},
+        "question_banks_in_flight": len(_question_banks),
+        "response_cache": get_response_cache().stats(),
+    }
@@ -1,9 +1,27 @@
+import logging
+
 import streamlit as st
 from src.components.topic_selection import TopicSelectionInterface
 from src.components.quiz import QuizInterface
 from src.components.learning_path import LearningPathInterface
 from src.components.slide_display import SlideDisplayInterface
 from src.components.quiz_results import QuizResultsInterface
+from src.router import dispatch
+from src.services.metrics import start_metrics_server
+from src.utils.assets import inject_stylesheet
+
+PAGES = {
+    'topic_selection': TopicSelectionInterface,
+    'quiz': QuizInterface,
+    'learning_path': LearningPathInterface,
+    'slide_display': SlideDisplayInterface,
+    'quiz_results': QuizResultsInterface,
+}
+
+# Info level so per-navigation rerun counts show up in the server log; once per process
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+# httpx logs every request at info level
+logging.getLogger("httpx").setLevel(logging.WARNING)
 
 def main():
     st.set_page_config(
@@ -13,36 +31,14 @@ def main():
         initial_sidebar_state="collapsed"
     )
 
-    # Initialize session state
-    if 'current_page' not in st.session_state:
-        st.session_state.current_page = 'topic_selection'
-        st.session_state.topic = ''
-        st.session_state.quiz_answers = []
-        st.session_state.learning_path = []
-        st.session_state.current_slide = None
-        st.session_state.quiz_results = {}
-
     # Hide the default Streamlit menu and footer
-    hide_streamlit_style = """
-    <style>
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-        header {visibility: hidden;}
-    </style>
-    """
-    st.markdown(hide_streamlit_style, unsafe_allow_html=True)
+    inject_stylesheet("app.css")
+
+    # Prometheus scrape endpoint, started once per process
+    start_metrics_server()
 
     # Navigation
-    if st.session_state.current_page == 'topic_selection':
-        TopicSelectionInterface()
-    elif st.session_state.current_page == 'quiz':
-        QuizInterface()
-    elif st.session_state.current_page == 'learning_path':
-        LearningPathInterface()
-    elif st.session_state.current_page == 'slide_display':
-        SlideDisplayInterface()
-    elif st.session_state.current_page == 'quiz_results':
-        QuizResultsInterface()
+    dispatch(PAGES)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""Pre-generate everything a session needs for a list of topics into the persistent caches.
+
+Run at deploy time so popular topics are served from cache from the first request:
+
+    python prewarm.py "Machine Learning" "Linear Algebra"
+    python prewarm.py --file topics.txt --workers 8
+
+With SENSAI_API_URL set, generation goes through the generation API, so its
+caches and audio store are the ones warmed; otherwise this process fills the
+local ones.
+"""
+
+import argparse
+import logging
+import math
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from dotenv import load_dotenv
+
+from src.services.adaptive_diagnostic import AdaptiveDiagnostic, probability_yes
+from src.services.generation_client import API_URL, RemoteNarration, get_generation_client
+from src.services.narration import NarrationStream
+from src.services.path_generator import generate_personalized_path, path_profile
+from src.services.question_bank import QuestionBank
+from src.services.response_cache import get_response_cache
+from src.services.slide_generator import generate_slide_content
+from src.services.topic_index import canonical_topic
+
+# Abilities (in logits) of the simulated learners whose quiz outcomes get a pre-generated path
+DEFAULT_ABILITIES = [-2.0, -1.0, 0.0, 1.0, 2.0]
+
+NARRATION_POLL_INTERVAL = 1.0
+
+# The generation API answers 429 while its queue is full; prewarming can wait
+MAX_BUSY_RETRIES = 10
+
+
+def simulate_diagnostic(items, theta):
+    """Run the adaptive quiz for a learner of ability ``theta`` who answers YES whenever that is more likely"""
+    diagnostic = AdaptiveDiagnostic()
+    while not diagnostic.is_complete():
+        item = diagnostic.next_item(items)
+        if item is None:
+            break
+        diagnostic.record(item, probability_yes(theta, item) >= 0.5)
+    return diagnostic
+
+
+def when_not_busy(function, *args):
+    """Call ``function``, backing off while the generation API reports it is overloaded"""
+    for attempt in range(MAX_BUSY_RETRIES):
+        try:
+            return function(*args)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 429 or attempt == MAX_BUSY_RETRIES - 1:
+                raise
+            time.sleep(2**attempt)
+
+
+def generate_path(topic, questions, answers, level):
+    client = get_generation_client()
+    if client is not None:
+        return when_not_busy(client.learning_path, topic, questions, answers, level)
+    return generate_personalized_path(topic, questions, answers, level)
+
+
+def prewarm_slide(topic, subtopic, narrate):
+    client = get_generation_client()
+    if client is not None:
+        markdown = when_not_busy(client.slide, topic, subtopic)
+        if narrate:
+            narration = when_not_busy(RemoteNarration, client, markdown)
+            # The API concatenates and stores the full clip once every chunk is synthesized
+            while when_not_busy(narration.clip_url) is None:
+                time.sleep(NARRATION_POLL_INTERVAL)
+        return
+
+    markdown = generate_slide_content(topic, subtopic)
+    if not narrate:
+        return
+    narration = NarrationStream(markdown)
+    # Drain every chunk, then store the concatenated clip the player prefers
+    for _ in narration:
+        pass
+    narration.clip_url()
+
+
+def prewarm_topic(topic, abilities, slide_executor, narrate=True):
+    """Warm the question bank, the paths of the simulated answer profiles and their slides for ``topic``"""
+    start = time.monotonic()
+    # Fetched from the generation API when one is configured
+    bank = QuestionBank(topic)
+    # The bank only reports done once generation has finished, whatever its size
+    bank.wait_for(math.inf)
+    items = bank.snapshot()
+
+    profiles = {}
+    for theta in abilities:
+        diagnostic = simulate_diagnostic(items, theta)
+        questions, answers, level = diagnostic.questions, diagnostic.answers, diagnostic.knowledge_level
+        profiles.setdefault(path_profile(topic, questions, answers, level), (questions, answers, level))
+
+    subtopics = []
+    for questions, answers, level in profiles.values():
+        for entry in generate_path(topic, questions, answers, level):
+            if entry["title"] not in subtopics:
+                subtopics.append(entry["title"])
+
+    futures = [slide_executor.submit(prewarm_slide, topic, subtopic, narrate) for subtopic in subtopics]
+    failed = 0
+    for future in futures:
+        try:
+            future.result()
+        except Exception as e:
+            failed += 1
+            logging.error(f"Failed to prewarm a slide for {topic}: {e}")
+
+    logging.info(
+        f"{topic}: {len(items)} questions, {len(profiles)} paths, {len(subtopics) - failed}/{len(subtopics)} slides "
+        f"in {time.monotonic() - start:.1f}s"
+    )
+    return failed == 0
+
+
+def read_topics(args):
+    topics = list(args.topics)
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            topics += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    # Warm the canonical topic sessions will map to; keep the given order, which is usually by popularity
+    return list(dict.fromkeys(canonical_topic(topic) for topic in topics))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("topics", nargs="*", help="topics to prewarm")
+    parser.add_argument("--file", help="file with one topic per line")
+    parser.add_argument("--top", type=int, help="only prewarm the first N topics")
+    parser.add_argument("--topic-workers", type=int, default=2, help="topics prewarmed concurrently")
+    parser.add_argument("--workers", type=int, default=4, help="slides (and their narration) generated concurrently")
+    parser.add_argument(
+        "--abilities",
+        type=float,
+        nargs="+",
+        default=DEFAULT_ABILITIES,
+        help="abilities of the simulated learners whose learning paths are pre-generated",
+    )
+    parser.add_argument("--no-narration", action="store_true", help="skip narration audio")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    args = parse_args(argv)
+
+    topics = read_topics(args)[: args.top]
+    if not topics:
+        logging.error("No topics given")
+        return 2
+
+    with ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="prewarm-slide") as slide_executor:
+        with ThreadPoolExecutor(max_workers=args.topic_workers, thread_name_prefix="prewarm-topic") as executor:
+            results = list(
+                executor.map(
+                    lambda topic: prewarm_topic(topic, args.abilities, slide_executor, not args.no_narration),
+                    topics,
+                )
+            )
+
+    if API_URL:
+        logging.info(f"Prewarmed {sum(results)}/{len(topics)} topics through the generation API at {API_URL}")
+    else:
+        stats = get_response_cache().stats()
+        logging.info(f"Prewarmed {sum(results)}/{len(topics)} topics; response cache holds {stats['entries']} entries")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
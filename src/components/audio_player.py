@@ -0,0 +1,73 @@
+import json
+
+import streamlit.components.v1 as components
+
+
+def AudioPlayer(urls, autoplay=True):
+    """Narration player with seek controls.
+
+    Plays ``urls`` back to back. The clips are served as static files, so
+    seeking uses HTTP range requests instead of re-sending the audio through
+    the Streamlit websocket. A chunk that is still being synthesized is retried
+    until it appears.
+    """
+    components.html(
+        f"""
+        <style>
+            .player {{ display: flex; align-items: center; gap: 0.5rem; font-family: sans-serif; }}
+            .player button {{
+                background: linear-gradient(135deg, #4f46e5 0%, #7c3aed 100%);
+                color: white; border: none; border-radius: 8px;
+                width: 40px; height: 40px; cursor: pointer; font-size: 1.2rem;
+            }}
+            .progress-container {{ flex: 1; height: 6px; background: #e5e7eb; border-radius: 3px; overflow: hidden; }}
+            .progress-bar {{ height: 100%; width: 0; background: linear-gradient(90deg, #4f46e5 0%, #7c3aed 100%); }}
+        </style>
+        <div class="player">
+            <audio id="narration" preload="auto"></audio>
+            <button onclick="seek(-10)" title="Rewind 10 seconds">⏮️</button>
+            <button onclick="seek(-5)" title="Backward 5 seconds">⏪</button>
+            <button id="toggle" onclick="toggle()" title="Play/Pause">▶️</button>
+            <button onclick="seek(5)" title="Forward 5 seconds">⏩</button>
+            <div class="progress-container"><div class="progress-bar" id="progress"></div></div>
+        </div>
+        <script>
+            const urls = {json.dumps(urls)};
+            const audio = document.getElementById("narration");
+            const toggleButton = document.getElementById("toggle");
+            let index = 0;
+            let retries = 0;
+
+            function load(i, play) {{
+                index = i;
+                audio.src = urls[i];
+                if (play) audio.play().catch(() => {{}});
+            }}
+            function seek(delta) {{
+                audio.currentTime = Math.max(0, Math.min(audio.duration || 0, audio.currentTime + delta));
+            }}
+            function toggle() {{
+                audio.paused ? audio.play().catch(() => {{}}) : audio.pause();
+            }}
+
+            audio.addEventListener("ended", () => {{
+                if (index + 1 < urls.length) load(index + 1, true);
+            }});
+            audio.addEventListener("error", () => {{
+                // The chunk has not been written to the store yet
+                if (retries++ < 120) setTimeout(() => load(index, true), 500);
+                else if (index + 1 < urls.length) {{ retries = 0; load(index + 1, true); }}
+            }});
+            audio.addEventListener("loadeddata", () => {{ retries = 0; }});
+            audio.addEventListener("play", () => {{ toggleButton.textContent = "⏸️"; }});
+            audio.addEventListener("pause", () => {{ toggleButton.textContent = "▶️"; }});
+            audio.addEventListener("timeupdate", () => {{
+                const share = audio.duration ? (index + audio.currentTime / audio.duration) / urls.length : 0;
+                document.getElementById("progress").style.width = `${{share * 100}}%`;
+            }});
+
+            load(0, {json.dumps(autoplay)});
+        </script>
+        """,
+        height=60,
+    )
@@ -1,16 +1,35 @@
-import streamlit as st
 import logging
-import os
-import time
+
+import plotly.graph_objects as go
 import streamlit as st
 from dotenv import load_dotenv
-from zai import ZaiClient
+
+from src.router import navigate
+from src.services.curriculum import LearningPathGraph
+from src.services.generation_client import get_generation_client
+from src.services.job_queue import get_job_queue
+from src.services.metrics import record_fallback, timed
+from src.services.model_router import stage_deadline
+from src.services.path_generator import generic_learning_path, knowledge_level
+from src.services.path_speculator import submit_path_job
+from src.services.slide_pipeline import SlidePipeline
+
+# Above this many topics the graph is drawn with WebGL traces
+WEBGL_NODE_THRESHOLD = 200
+
+PATH_JOB_LABELS = {
+    "pending": "Waiting for a free generator...",
+    "running": "Building your learning path...",
+}
+
+NODE_COLORS = {"done": "#2e7d32", "available": "#1f77b4", "locked": "#9e9e9e"}
 
 
 class LearningPathInterfaceClass:
     def __init__(self):
         load_dotenv()
         self.generate_learning_path()
+        self.start_slide_generation()
         self.display_graph()
 
     def generate_learning_path(self):
@@ -26,86 +45,65 @@ class LearningPathInterfaceClass:
         questions = quiz_data["questions"]
         answers = quiz_data["answers"]
 
-        # Calculate knowledge level based on yes answers
-        yes_count = sum(1 for answer in answers if answer)
-        knowledge_level = yes_count / len(answers) if answers else 0.5
-
-        # Generate personalized learning path using z.ai
-        self.generate_personalized_path(topic, questions, answers, knowledge_level)
-
-    def generate_personalized_path(self, topic, questions, answers, knowledge_level):
-        """Generate learning path based on user's knowledge level and quiz responses"""
-        try:
-            # Build context based on quiz answers
-            yes_questions = [q for q, a in zip(questions, answers) if a]
-            no_questions = [q for q, a in zip(questions, answers) if not a]
-
-            prompt = f"""Generate a personalized learning path for someone learning about "{topic}".
-
-            The user's knowledge level: {knowledge_level:.2f} (0.0 = beginner, 1.0 = expert)
-
-            Questions they answered YES to (their strengths):
-            {chr(10).join(f"- {q}" for q in yes_questions[:3])}
-
-            Questions they answered NO to (their weaknesses):
-            {chr(10).join(f"- {q}" for q in no_questions[:3])}
-
-            Based on this assessment, generate exactly 4-6 subtopics that:
-            1. Start with fundamentals they need to learn first
-            2. Progress gradually to more advanced topics
-            3. Focus on areas where they indicated weakness
-            4. Build upon areas where they indicated strength
-            5. Are specific and practical for {topic}
-
-            Return only the subtopics, one per line, numbered 1-6."""
-
-            # Use z.ai to generate personalized learning path
-            client = ZaiClient(api_key=os.getenv("ANTHROPIC_AUTH_TOKEN"))
-            response = client.chat.completions.create(
-                model="glm-4.5", messages=[{"role": "user", "content": prompt}], max_tokens=2000, temperature=0.7
-            )
-
-            content = response.choices[0].message.content
-
-            # Parse the response
-            subtopics = []
-            lines = content.strip().split("\n")
-
-            for line in lines:
-                line = line.strip()
-                if line and any(char.isdigit() for char in line[:3]):
-                    # Extract topic after the number
-                    parts = line.split(".", 1)
-                    if len(parts) > 1:
-                        topic_name = parts[1].strip()
-                        if topic_name:
-                            subtopics.append(topic_name)
-
-            if not subtopics:
-                # Fallback to generic generation
-                self.generate_generic_learning_path(topic)
-            else:
-                st.session_state.learning_path = subtopics[:6]  # Limit to 6 topics
-
-        except Exception as e:
-            logging.error(f"Failed to generate personalized learning path: {e}")
-            self.generate_generic_learning_path(topic)
+        # Reuse the path generated for these exact quiz results on earlier reruns
+        path_key = learning_path_key(topic, questions, answers)
+        if st.session_state.get("learning_path_key") == path_key and st.session_state.get("learning_graph"):
+            return
+
+        # The request joins the path speculatively started during the quiz, if there is one
+        speculator = st.session_state.pop("path_speculator", None)
+        level = quiz_data.get("knowledge_level")
+        if speculator is not None:
+            speculator.settle(topic, questions, answers, level)
+        learning_path = self.wait_for_path(topic, questions, answers, level)
+
+        set_learning_path(learning_path)
+        st.session_state.learning_path_key = path_key
+
+    def wait_for_path(self, topic, questions, answers, level):
+        """Generate the personalized path through the generation API or a local worker process.
+
+        Either way identical requests are coalesced, so a rerun meanwhile rejoins the same generation.
+        Past the stage's deadline the generic path is shown instead; a queued job keeps running so
+        its result is reused by the next identical request.
+        """
+        client = get_generation_client()
+        timeout = stage_deadline("learning_path")
+        with st.status("Building your learning path...") as status:
+            try:
+                if client is not None:
+                    learning_path = client.learning_path(topic, questions, answers, level, timeout=timeout)
+                else:
+                    queue = get_job_queue()
+                    job_id = submit_path_job(topic, questions, answers, level)
+                    learning_path = queue.wait(
+                        job_id,
+                        timeout=timeout,
+                        on_status=lambda state: status.update(label=PATH_JOB_LABELS.get(state, "Finishing up...")),
+                    )
+            except Exception as e:
+                logging.error(f"Learning path job failed: {e}")
+                record_fallback("learning_path")
+                learning_path = generic_learning_path(topic)
+            status.update(label="Learning path ready", state="complete")
+        return learning_path
 
     def generate_generic_learning_path(self, topic):
         """Generate a generic learning path as fallback"""
-        subtopics = [
-            f"Introduction to {topic}",
-            f"Basic Concepts of {topic}",
-            f"Core Principles of {topic}",
-            f"Intermediate Topics in {topic}",
-            f"Advanced Concepts of {topic}",
-            f"Practical Applications of {topic}",
-            f"Tools and Methods for {topic}",
-            f"Best Practices in {topic}",
-            f"Real-world Examples of {topic}",
-            f"Future Trends in {topic}",
-        ]
-        st.session_state.learning_path = subtopics[:8]
+        if st.session_state.get("learning_graph") is None:
+            set_learning_path(generic_learning_path(topic))
+
+    def start_slide_generation(self):
+        """Generate slides for every subtopic in the background as soon as the path is known"""
+        topic = st.session_state.get("topic", "this subject")
+        learning_path = st.session_state.learning_path
+        pipeline = st.session_state.get("slide_pipeline")
+        if pipeline is not None and pipeline.topic == topic and pipeline.subtopics == learning_path:
+            return
+
+        if pipeline is not None:
+            pipeline.cancel()
+        st.session_state.slide_pipeline = SlidePipeline(topic, learning_path)
 
     def display_graph(self):
         st.title("🗺️ Your Personalized Learning Path")
@@ -115,7 +113,7 @@ class LearningPathInterfaceClass:
             quiz_data = st.session_state.quiz_data
             answers = quiz_data["answers"]
             yes_count = sum(1 for answer in answers if answer)
-            knowledge_level = yes_count / len(answers) if answers else 0.5
+            level = quiz_data.get("knowledge_level", knowledge_level(answers))
 
             # Progress indicator
             progress = 0.6  # Quiz completed, now at learning path
@@ -129,11 +127,11 @@ class LearningPathInterfaceClass:
                 st.metric("Answered Yes", f"{yes_count}/{len(answers)}")
 
             with col2:
-                st.metric("Knowledge Level", f"{knowledge_level:.1%}")
+                st.metric("Knowledge Level", f"{level:.1%}")
 
             with col3:
                 level_text = (
-                    "Beginner" if knowledge_level < 0.3 else "Intermediate" if knowledge_level < 0.7 else "Advanced"
+                    "Beginner" if level < 0.3 else "Intermediate" if level < 0.7 else "Advanced"
                 )
                 st.metric("Level", level_text)
 
@@ -165,25 +163,99 @@ class LearningPathInterfaceClass:
         )
 
     def create_interactive_graph(self):
-        learning_path = st.session_state.learning_path
+        graph = st.session_state.learning_graph
 
-        # Add clickable buttons for each node below the chart
         st.markdown("---")
         st.markdown("### **Click on a topic to start learning:**")
+        st.plotly_chart(
+            learning_path_figure(graph),
+            key="learning_path_chart",
+            on_select=self.select_node,
+            selection_mode="points",
+            use_container_width=True,
+        )
+
+    def select_node(self):
+        """Open the slide for the clicked node"""
+        points = st.session_state.learning_path_chart.selection.points
+        topic = next((point.get("customdata") for point in points if point.get("customdata")), None)
+        if isinstance(topic, list):
+            topic = topic[0]
+        if topic in st.session_state.learning_graph.graph:
+            self.open_slide(topic)
+
+    def open_slide(self, topic):
+        st.session_state.slide_pipeline.prioritize(topic)
+        navigate("open_slide", current_slide=topic)
+
+
+def learning_path_figure(graph):
+    """Plotly figure of the learning path; switches to WebGL traces for large curricula"""
+    with timed("render", step="learning_path_figure"):
+        return _learning_path_figure(graph)
+
+
+def _learning_path_figure(graph):
+    positions = graph.layout()
+    order = graph.order()
+    available = set(graph.available())
+    large = len(order) > WEBGL_NODE_THRESHOLD
+    Scatter = go.Scattergl if large else go.Scatter
+
+    edge_x, edge_y = [], []
+    for prerequisite, topic in graph.graph.edges:
+        (x0, y0), (x1, y1) = positions[prerequisite], positions[topic]
+        edge_x += [x0, x1, None]
+        edge_y += [y0, y1, None]
+
+    colors = [
+        NODE_COLORS["done"] if graph.is_done(t) else NODE_COLORS["available" if t in available else "locked"]
+        for t in order
+    ]
+    edges = Scatter(x=edge_x, y=edge_y, mode="lines", line={"width": 1, "color": "#bbb"}, hoverinfo="skip")
+    nodes = Scatter(
+        x=[positions[t][0] for t in order],
+        y=[positions[t][1] for t in order],
+        # Labels on hundreds of nodes are unreadable and slow to lay out; hover shows them instead
+        mode="markers" if large else "markers+text",
+        text=order,
+        textposition="bottom center",
+        customdata=order,
+        hovertemplate="%{customdata}<extra></extra>",
+        marker={"size": 10 if large else 24, "color": colors, "line": {"width": 1, "color": "#fff"}},
+    )
+
+    figure = go.Figure([edges, nodes])
+    figure.update_layout(
+        showlegend=False,
+        clickmode="event+select",
+        dragmode="pan" if large else False,
+        height=min(1200, 160 + 110 * len(graph.by_level())),
+        margin={"l": 10, "r": 10, "t": 10, "b": 10},
+        xaxis={"visible": False},
+        yaxis={"visible": False},
+    )
+    return figure
+
+
+def set_learning_path(topics):
+    """Store the prerequisite graph for ``topics`` and its topological order as the learning path"""
+    graph = LearningPathGraph.from_topics(topics)
+    st.session_state.learning_graph = graph
+    st.session_state.learning_path = graph.order()
+
+
+def learning_path_key(topic, questions, answers):
+    """Key identifying the quiz results a learning path was generated for"""
+    return (topic, tuple(questions), tuple(answers))
+
+
+def invalidate_learning_path():
+    """Drop the memoized learning path so the next run regenerates it"""
+    st.session_state.pop("learning_path_key", None)
+    st.session_state.pop("learning_graph", None)
+    st.session_state.learning_path = []
 
-        # Create columns for the topic buttons
-        cols = st.columns(len(learning_path))
-
-        for i, topic in enumerate(learning_path):
-            with cols[i]:
-                if st.button(
-                    topic,
-                    key=f"node_{i}",
-                    use_container_width=True
-                ):
-                    st.session_state.current_slide = topic
-                    st.session_state.current_page = 'slide_display'
-                    st.rerun()
 
 def LearningPathInterface():
     interface = LearningPathInterfaceClass()
@@ -1,165 +1,106 @@
-import logging
-import os
-import time
-
 import streamlit as st
 from dotenv import load_dotenv
-from zai import ZaiClient
+
+from src.components.learning_path import invalidate_learning_path
+from src.router import navigate, persist_session
+from src.services.adaptive_diagnostic import MAX_QUESTIONS, AdaptiveDiagnostic
+from src.services.path_speculator import PathSpeculator
+from src.services.question_bank import QuestionBank
+from src.utils.assets import inject_stylesheet
 
 
 class QuizInterfaceClass:
     def __init__(self):
         load_dotenv()
 
-        # Generate dynamic questions using z.ai if not already generated
-        if "quiz_questions" not in st.session_state:
-            self.generate_questions()
-
-        # Initialize session state
-        if "current_question" not in st.session_state:
-            st.session_state.current_question = 0
-            st.session_state.quiz_answers = []
-
-        self.display_question()
-
-    def generate_questions(self):
-        """Generate 6 crucial yes/no questions using z.ai based on the topic"""
+        # Load the topic's question bank; it is generated once per topic and cached
         topic = st.session_state.get("topic", "this subject")
+        bank = st.session_state.get("question_bank")
+        if bank is None and st.session_state.get("diagnostic") is not None:
+            # Resuming a quiz restored from the session store; the bank comes back from the caches
+            st.session_state.question_bank = QuestionBank(topic)
+        elif bank is None or bank.topic != topic:
+            self.start_diagnostic(topic)
+
+        inject_stylesheet("quiz.css")
+        self.display_question()
 
-        prompt = f"""Generate 6-8 diagnostic yes/no questions for a beginner learning about "{topic}".
-
-        Questions should progress from general to specific, covering these levels of specificity:
-        1. General awareness and interest level in {topic}
-        2. Basic familiarity with fundamental {topic} concepts
-        3. Experience with tools or methods commonly used in {topic}
-        4. Specific knowledge of {topic} terminology and jargon
-        5. Hands-on experience with practical {topic} applications
-        6. Advanced understanding of {topic} concepts or methodologies
-
-        Return only the questions, one per line, starting each with a number (1-X).
-        Ensure questions flow from broad to specific assessment.
-        Generate at least 6 but no more than 8 questions depending on the complexity of {topic}."""
-
-        try:
-            # Use z.ai SDK to generate questions
-            client = ZaiClient(api_key=os.getenv("ANTHROPIC_AUTH_TOKEN"))
-
-            response = client.chat.completions.create(
-                model="glm-4.5",
-                messages=[{"role": "user", "content": prompt}],
-                thinking={
-                    "type": "enabled",
-                },
-                max_tokens=4096,
-                temperature=0.6,
-            )
-
-            content = response.choices[0].message.content
-
-            # Enhanced parsing with multiple fallback strategies
-
-            # Try different parsing strategies
-            questions = []
-
-            # Strategy 1: Parse numbered questions
-            lines = content.strip().split("\n")
-
-            for line in lines:
-                line = line.strip()
-                if line:
-                    # Check if line starts with a number (e.g., "1.", "1. Question", etc.)
-                    if any(char.isdigit() for char in line[:3]):
-                        # Extract question after the number
-                        parts = line.split(".", 1)
-                        if len(parts) > 1:
-                            question = parts[1].strip()
-                        else:
-                            question = line.strip()
-
-                        # Clean up question
-                        question = question.strip(" \"'")
-                        if question and not question.endswith("?"):
-                            question += "?"
-                        if question:
-                            questions.append(question)
-
-            # Strategy 2: If no numbered questions found, look for question marks
-            if not questions:
-                potential_questions = [line.strip() for line in lines if line.strip().endswith("?")]
-                questions.extend(potential_questions[:8])  # Take up to 8 questions
-
-            # Strategy 3: If still no questions, split by common separators
-            if not questions:
-                sentences = []
-                for line in lines:
-                    if line.strip():
-                        # Split by common question endings
-                        parts = line.split(["?", "？", ".", "。"])
-                        for part in parts:
-                            part = part.strip()
-                            if part and len(part) > 10:  # Reasonable length for a question
-                                sentences.append(part + "?")
-
-                questions.extend(sentences[:8])
-
-            # Ensure we have at least 3 questions, pad if needed
-            while len(questions) < 3:
-                questions.append(f"Do you have any prior knowledge about {topic}?")
-
-            # Limit to maximum 8 questions
-            questions = questions[:8]
-
-            # Validate questions
-            valid_questions = []
-            for q in questions:
-                if len(q.strip()) > 5 and "?" in q:  # Basic validation
-                    valid_questions.append(q.strip())
-
-            if not valid_questions:
-                valid_questions = [
-                    f"Do you have any prior knowledge about {topic}?",
-                    "Have you studied related subjects before?",
-                    f"Are you comfortable with basic concepts in {topic}?",
-                ]
-
-            st.session_state.quiz_questions = valid_questions
-
-        except Exception as e:
-            # Log the error
-            logging.error(f"Failed to generate questions via z.ai API: {e}")
-            # Fallback to hardcoded questions if API fails
-            fallback_questions = [
-                f"Do you have any prior knowledge about {topic}?",
-                "Have you studied related subjects before?",
-                f"Are you comfortable with basic concepts in {topic}?",
-                "Do you prefer visual learning over text-based learning?",
-                "Have you used online learning platforms before?",
-                "Are you interested in hands-on practice along with theory?",
-            ]
-            st.session_state.quiz_questions = fallback_questions
+    def start_diagnostic(self, topic):
+        """Reset the quiz state for an adaptive diagnostic on ``topic``"""
+        st.session_state.question_bank = QuestionBank(topic)
+        st.session_state.diagnostic = AdaptiveDiagnostic()
+        st.session_state.current_item = None
+        st.session_state.current_question = 0
+        st.session_state.quiz_questions = []
+        st.session_state.quiz_answers = []
+
+    def select_question(self):
+        """Pick the most informative unasked question locally, waiting for the bank only when it has none"""
+        bank = st.session_state.question_bank
+        diagnostic = st.session_state.diagnostic
+
+        item = diagnostic.next_item(bank.snapshot())
+        while item is None and not bank.done:
+            with st.spinner("Generating your questions..."):
+                if not bank.wait_for(len(bank.items) + 1, timeout=bank.item_timeout()):
+                    bank.fall_back()
+            item = diagnostic.next_item(bank.snapshot())
+
+        st.session_state.current_item = item
+        st.session_state.quiz_questions = diagnostic.questions + ([item["question"]] if item else [])
+        return item
+
+    def has_more_questions(self, exclude=None):
+        bank = st.session_state.question_bank
+        if not bank.done:
+            return True
+        items = [item for item in bank.snapshot() if exclude is None or item["question"] != exclude["question"]]
+        return st.session_state.diagnostic.next_item(items) is not None
+
+    def speculate_learning_path(self, item):
+        """Start generating the learning paths this answer can finish the quiz with"""
+        diagnostic = st.session_state.diagnostic
+        last_question = not self.has_more_questions(exclude=item)
+
+        candidates = []
+        for answer in (True, False):
+            stop, level = diagnostic.outcome_after(item, answer)
+            if stop or last_question:
+                candidates.append((diagnostic.answers + [answer], level))
+        if not candidates:
+            return
+
+        if "path_speculator" not in st.session_state:
+            st.session_state.path_speculator = PathSpeculator()
+        st.session_state.path_speculator.speculate(
+            st.session_state.get("topic", "this subject"), diagnostic.questions + [item["question"]], candidates
+        )
 
+    @st.fragment
     def display_question(self):
-        current_idx = st.session_state.current_question
-        total_questions = len(st.session_state.quiz_questions)
+        """Render the question card; answering reruns only this fragment"""
+        if st.session_state.current_page != "quiz":
+            # The last answer completed the quiz, so move on with a full app run
+            st.rerun()
 
-        # Progress bar
-        progress = (current_idx + 1) / total_questions
+        current_idx = st.session_state.current_question
+        item = st.session_state.current_item or self.select_question()
+        if item is None:
+            # The bank ran out of questions before the estimate settled
+            self.complete_quiz()
+            st.rerun()
+        self.speculate_learning_path(item)
+
+        # Progress bar; the quiz stops early once the level is clear
+        progress = (current_idx + 1) / MAX_QUESTIONS
         st.progress(progress)
-        st.markdown(f"**Question {current_idx + 1} of {total_questions}**")
+        st.markdown(f"**Question {current_idx + 1} of up to {MAX_QUESTIONS}**")
 
-        # Single question display
+        # Single question display; alternating the class restarts the CSS entry animation in the browser
         st.markdown(
             f"""
-            <div style="
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                padding: 2rem;
-                border-radius: 15px;
-                margin: 2rem 0;
-                box-shadow: 0 10px 30px rgba(0,0,0,0.2);
-            ">
-                <h2 style="color: white; text-align: center; font-size: 1.8rem; margin-bottom: 1.5rem;">
-                    {st.session_state.quiz_questions[current_idx]}
-                </h2>
+            <div class="quiz-card quiz-card-{current_idx % 2}">
+                <h2>{item["question"]}</h2>
             </div>
             """,
             unsafe_allow_html=True,
@@ -169,40 +110,39 @@ class QuizInterfaceClass:
         col1, col2, col3 = st.columns([2, 1, 2])
 
         with col1:
-            if st.button("✅ Yes", use_container_width=True, type="primary"):
-                self.save_answer(True)
-                if current_idx < len(st.session_state.quiz_questions) - 1:
-                    st.session_state.current_question += 1
-                    st.rerun()
-                else:
-                    self.complete_quiz()
+            st.button(
+                "✅ Yes", use_container_width=True, type="primary", on_click=self.answer_question, args=(True,)
+            )
 
         with col3:
-            if st.button("❌ No", use_container_width=True):
-                self.save_answer(False)
-                if current_idx < len(st.session_state.quiz_questions) - 1:
-                    st.session_state.current_question += 1
-                    st.rerun()
-                else:
-                    self.complete_quiz()
+            st.button("❌ No", use_container_width=True, on_click=self.answer_question, args=(False,))
+
+    def answer_question(self, answer):
+        diagnostic = st.session_state.diagnostic
+        self.save_answer(answer)
+        if diagnostic.is_complete() or not self.has_more_questions():
+            self.complete_quiz()
+        else:
+            st.session_state.current_question += 1
+            st.toast("✅ Answer saved! Moving to next question...")
+        # Answers rerun only the question fragment, which never reaches dispatch(), so persist here
+        persist_session()
 
     def save_answer(self, answer):
+        st.session_state.diagnostic.record(st.session_state.current_item, answer)
         st.session_state.quiz_answers.append(answer)
-
-        # Add a subtle animation effect
-        if len(st.session_state.quiz_answers) < len(st.session_state.quiz_questions):
-            st.success("✅ Answer saved! Moving to next question...")
-            time.sleep(0.5)
+        st.session_state.current_item = None
 
     def complete_quiz(self):
         # Save both questions and answers to session for later use in learning path generation
         st.session_state.quiz_data = {
             "topic": st.session_state.get("topic", "this subject"),
-            "questions": st.session_state.quiz_questions.copy(),
+            "questions": st.session_state.diagnostic.questions,
             "answers": st.session_state.quiz_answers.copy(),
+            "knowledge_level": st.session_state.diagnostic.knowledge_level,
         }
-        st.session_state.current_page = "learning_path"
-        st.rerun()
+        invalidate_learning_path()
+        navigate("complete_quiz")
 
 
 def QuizInterface():
@@ -2,6 +2,8 @@ import streamlit as st
 import time
 import random
 
+from src.router import navigate
+
 class QuizResultsInterfaceClass:
     def __init__(self):
         self.quiz_questions = [
@@ -160,17 +162,21 @@ class QuizResultsInterfaceClass:
         col1, col2, col3 = st.columns([1, 1, 1])
 
         with col1:
-            if st.button("🔄 Start New Topic", use_container_width=True):
-                st.success("Starting new learning journey...")
-                st.session_state.current_page = 'topic_selection'
-                st.session_state.clear()
-                st.rerun()
+            st.button(
+                "🔄 Start New Topic",
+                use_container_width=True,
+                on_click=navigate,
+                args=("new_topic",),
+                kwargs={"clear_session": True}
+            )
 
         with col2:
-            if st.button("📚 Review Topics", use_container_width=True):
-                st.info("Navigating back to learning path...")
-                st.session_state.current_page = 'learning_path'
-                st.rerun()
+            st.button(
+                "📚 Review Topics",
+                use_container_width=True,
+                on_click=navigate,
+                args=("review_topics",)
+            )
 
         with col3:
             if st.button("📊 View Progress", use_container_width=True):
@@ -1,5 +1,26 @@
 import streamlit as st
 
+from src.router import navigate
+from src.services.topic_index import canonical_topic, suggest_topic
+
+def start_learning():
+    topic = st.session_state.topic_input.strip()
+    if not topic:
+        st.session_state.topic_error = True
+        return
+
+    # A near match is only offered; what the user typed is never swapped out silently
+    suggestion = suggest_topic(topic)
+    if suggestion is not None and st.session_state.get("topic_suggestion") != (topic, suggestion):
+        st.session_state.topic_suggestion = (topic, suggestion)
+        return
+    choose_topic(topic)
+
+def choose_topic(topic):
+    st.session_state.pop("topic_suggestion", None)
+    # Equivalent spellings share one canonical topic, and with it all generated content
+    navigate("start_quiz", topic=canonical_topic(topic))
+
 def TopicSelectionInterface():
     st.title("🧠 sensAI - LLM Learning Tool")
 
@@ -35,17 +56,24 @@ def TopicSelectionInterface():
         )
 
         # Start Learning button
-        if st.button(
+        st.button(
             "🚀 Start Learning",
             type="primary",
-            use_container_width=True
-        ):
-            if topic.strip():
-                st.session_state.topic = topic.strip()
-                st.session_state.current_page = 'quiz'
-                st.rerun()
-            else:
-                st.error("Please enter a topic to learn about.")
+            use_container_width=True,
+            on_click=start_learning
+        )
+        if st.session_state.pop("topic_error", False):
+            st.error("Please enter a topic to learn about.")
+
+        suggestion = st.session_state.get("topic_suggestion")
+        if suggestion is not None and suggestion[0] == topic.strip():
+            typed, canonical = suggestion
+            st.info(f"Did you mean **{canonical}**?")
+            use_col, keep_col = st.columns(2)
+            with use_col:
+                st.button(f"Learn {canonical}", use_container_width=True, on_click=choose_topic, args=(canonical,))
+            with keep_col:
+                st.button(f"Keep \"{typed}\"", use_container_width=True, on_click=choose_topic, args=(typed,))
 
         # Instructions
         st.markdown("---")
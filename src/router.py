@@ -0,0 +1,217 @@
+import logging
+import re
+import uuid
+
+import streamlit as st
+
+from src.services.adaptive_diagnostic import AdaptiveDiagnostic
+from src.services.curriculum import LearningPathGraph
+from src.services.metrics import COUNT_BUCKETS, observe, set_trace_session, timed, trace
+from src.services.session_store import get_session_store
+
+# (current page, event) -> next page
+TRANSITIONS = {
+    ("topic_selection", "start_quiz"): "quiz",
+    ("quiz", "complete_quiz"): "learning_path",
+    ("learning_path", "open_slide"): "slide_display",
+    ("slide_display", "next_slide"): "quiz_results",
+    ("quiz_results", "review_topics"): "learning_path",
+    ("quiz_results", "new_topic"): "topic_selection",
+}
+
+SESSION_DEFAULTS = {
+    "current_page": "topic_selection",
+    "topic": "",
+    "quiz_answers": [],
+    "learning_path": [],
+    "current_slide": None,
+    "quiz_results": {},
+}
+
+# Session keys persisted to the session store; everything else (question banks, pipelines,
+# narration streams) is rebuilt on demand. Values are plain data unless they have a codec.
+PERSISTED_KEYS = [
+    "current_page",
+    "topic",
+    "current_question",
+    "current_item",
+    "quiz_questions",
+    "quiz_answers",
+    "diagnostic",
+    "quiz_data",
+    "learning_path",
+    "learning_path_key",
+    "learning_graph",
+    "current_slide",
+    "quiz_results",
+    "voice_playing",
+]
+
+# key -> (to plain data, from plain data)
+SESSION_CODECS = {
+    "diagnostic": (AdaptiveDiagnostic.to_dict, AdaptiveDiagnostic.from_dict),
+    "learning_graph": (LearningPathGraph.to_dict, LearningPathGraph.from_dict),
+    "learning_path_key": (list, lambda key: (key[0], tuple(key[1]), tuple(key[2]))),
+}
+
+SESSION_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+def init_session_state():
+    for key, value in SESSION_DEFAULTS.items():
+        if key not in st.session_state:
+            st.session_state[key] = value.copy() if isinstance(value, (list, dict)) else value
+
+
+def navigate(event, clear_session=False, **state):
+    """Apply a page transition; meant to be used as a widget on_click callback.
+
+    Callbacks run before the script, so the next run renders the target page
+    directly instead of rendering the old page and calling st.rerun().
+    """
+    current_page = st.session_state.current_page
+    target = TRANSITIONS.get((current_page, event))
+    if target is None:
+        logging.warning(f"Ignoring navigation event {event!r} on page {current_page!r}")
+        return
+
+    stats = _navigation_stats()
+    if clear_session:
+        session_id = st.session_state.get("session_id")
+        st.session_state.clear()
+        st.session_state.navigation_stats = stats
+        if session_id is not None:
+            st.session_state.session_id = session_id
+        init_session_state()
+
+    for key, value in state.items():
+        st.session_state[key] = value
+    st.session_state.current_page = target
+    stats["pending_since_run"] = stats["runs"]
+
+
+def dispatch(pages):
+    """Render the current page from ``pages`` and record how many script runs each navigation took"""
+    init_session_state()
+    restore_session()
+    set_trace_session(st.session_state.session_id)
+    stats = _navigation_stats()
+    stats["runs"] += 1
+
+    page = st.session_state.current_page
+    deltas = _count_deltas()
+    try:
+        with timed("page_render", page=page):
+            pages[page]()
+    finally:
+        # Also runs when the page calls st.rerun(), which raises
+        persist_session()
+        if deltas is not None:
+            observe("sensai_page_deltas", deltas(), COUNT_BUCKETS, page=page)
+
+    # Only reached once a page rendered without requesting another rerun
+    if stats["pending_since_run"] is not None:
+        runs = stats["runs"] - stats["pending_since_run"]
+        stats["navigations"] += 1
+        stats["navigation_runs"] += runs
+        stats["pending_since_run"] = None
+        observe("sensai_navigation_runs", runs, COUNT_BUCKETS, page=page)
+        trace("navigation", page=page, runs=runs)
+        logging.info(
+            f"Navigation to {page} took {runs} script run(s), "
+            f"{reruns_per_navigation():.2f} on average over {stats['navigations']} this session"
+        )
+
+
+def _count_deltas():
+    """Count the delta messages (element updates) the current script run sends to the browser.
+
+    Wraps the run context's private enqueue hook; returns a function that
+    unwraps it and returns the count, or None when this Streamlit version does
+    not expose the hook.
+    """
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx()
+    enqueue = getattr(ctx, "_enqueue", None)
+    if enqueue is None:
+        return None
+
+    count = [0]
+
+    def counting_enqueue(msg):
+        if msg.HasField("delta"):
+            count[0] += 1
+        return enqueue(msg)
+
+    def finish():
+        ctx._enqueue = enqueue
+        return count[0]
+
+    ctx._enqueue = counting_enqueue
+    return finish
+
+
+def restore_session():
+    """Rehydrate a new browser session from the store using the session id in the URL.
+
+    Only runs once per Streamlit session, so the store is read only after a
+    reconnect to a fresh process (a restart or another replica).
+    """
+    if "session_id" in st.session_state:
+        return
+
+    store = get_session_store()
+    if store is None:
+        # Nothing is persisted, but the id still names this session's trace
+        st.session_state.session_id = uuid.uuid4().hex
+        return
+
+    session_id = st.query_params.get("sid")
+    data = store.load(session_id) if session_id and SESSION_ID_PATTERN.match(session_id) else None
+    if data is None:
+        session_id = uuid.uuid4().hex
+    else:
+        for key, value in data.items():
+            decode = SESSION_CODECS.get(key, (None, lambda v: v))[1]
+            try:
+                st.session_state[key] = decode(value)
+            except Exception as e:
+                logging.warning(f"Dropping unreadable session key {key!r}: {e}")
+    st.session_state.session_id = session_id
+    st.query_params["sid"] = session_id
+
+
+def persist_session():
+    """Hand a snapshot of the persisted keys to the write-behind session store"""
+    session_id = st.session_state.get("session_id")
+    store = get_session_store()
+    if session_id is None or store is None:
+        return
+
+    snapshot = {}
+    for key in PERSISTED_KEYS:
+        value = st.session_state.get(key)
+        if value is not None:
+            encode = SESSION_CODECS.get(key, (lambda v: v, None))[0]
+            snapshot[key] = encode(value)
+    store.save(session_id, snapshot)
+
+
+def reruns_per_navigation():
+    """Average number of script runs a navigation took in this session; 1.0 means no extra reruns"""
+    stats = _navigation_stats()
+    return stats["navigation_runs"] / stats["navigations"] if stats["navigations"] else 0.0
+
+
+def _navigation_stats():
+    if "navigation_stats" not in st.session_state:
+        st.session_state.navigation_stats = {
+            "runs": 0,
+            "navigations": 0,
+            "navigation_runs": 0,
+            "pending_since_run": None,
+        }
+    return st.session_state.navigation_stats
@@ -0,0 +1,122 @@
+import math
+
+# Ability grid for the posterior, in logits
+THETA_GRID = [i / 10 for i in range(-40, 41)]
+
+MIN_QUESTIONS = 3
+MAX_QUESTIONS = 8
+
+# Stop once this much posterior mass falls within a single level band
+CONFIDENCE = 0.85
+
+# Item discrimination shared by all bank questions (one-parameter logistic model)
+DISCRIMINATION = 1.5
+
+# Knowledge level boundaries used for Beginner / Intermediate / Advanced
+LEVEL_BANDS = (0.3, 0.7)
+
+
+def item_difficulty(item):
+    """Map the bank's 1-5 difficulty tag onto the ability scale"""
+    return (item["difficulty"] - 3) * 0.9
+
+
+def probability_yes(theta, item):
+    return 1 / (1 + math.exp(-DISCRIMINATION * (theta - item_difficulty(item))))
+
+
+def level_from_ability(theta):
+    """Knowledge level in [0, 1]: the chance of a YES on a medium difficulty question"""
+    return 1 / (1 + math.exp(-theta))
+
+
+class AdaptiveDiagnostic:
+    """Bayesian ability estimate that picks the most informative next question.
+
+    Keeps a discretized posterior over ability, updates it with each YES/NO
+    answer and stops as soon as the learner's level band is clear.
+    """
+
+    def __init__(self):
+        prior = [math.exp(-theta * theta / 2) for theta in THETA_GRID]
+        self.posterior = self._normalize(prior)
+        self.asked = []
+        self.answers = []
+
+    @property
+    def questions(self):
+        return [item["question"] for item in self.asked]
+
+    @property
+    def knowledge_level(self):
+        return level_from_ability(self.estimate()[0])
+
+    def to_dict(self):
+        return {"asked": self.asked, "answers": self.answers}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild by replaying the recorded answers, which reproduces the posterior exactly"""
+        diagnostic = cls()
+        for item, answer in zip(data["asked"], data["answers"]):
+            diagnostic.record(item, answer)
+        return diagnostic
+
+    def record(self, item, answer):
+        self.posterior = self._update(self.posterior, item, answer)
+        self.asked.append(item)
+        self.answers.append(answer)
+
+    def estimate(self, posterior=None):
+        """Posterior mean and standard deviation of the ability"""
+        posterior = posterior or self.posterior
+        mean = sum(p * theta for p, theta in zip(posterior, THETA_GRID))
+        variance = sum(p * (theta - mean) ** 2 for p, theta in zip(posterior, THETA_GRID))
+        return mean, math.sqrt(variance)
+
+    def next_item(self, items):
+        """The unasked item with the most Fisher information at the current estimate, or None"""
+        asked = {item["question"] for item in self.asked}
+        candidates = [item for item in items if item["question"] not in asked]
+        if not candidates:
+            return None
+
+        theta = self.estimate()[0]
+
+        def information(item):
+            p = probability_yes(theta, item)
+            return DISCRIMINATION**2 * p * (1 - p)
+
+        return max(candidates, key=information)
+
+    def is_complete(self):
+        return self._should_stop(self.posterior, len(self.answers))
+
+    def outcome_after(self, item, answer):
+        """(would the quiz stop, knowledge level) if ``item`` were answered with ``answer``"""
+        posterior = self._update(self.posterior, item, answer)
+        stop = self._should_stop(posterior, len(self.answers) + 1)
+        return stop, level_from_ability(self.estimate(posterior)[0])
+
+    def _should_stop(self, posterior, answered):
+        if answered >= MAX_QUESTIONS:
+            return True
+        if answered < MIN_QUESTIONS:
+            return False
+
+        low, high = (math.log(band / (1 - band)) for band in LEVEL_BANDS)
+        bands = [0.0, 0.0, 0.0]
+        for p, theta in zip(posterior, THETA_GRID):
+            bands[0 if theta < low else 1 if theta < high else 2] += p
+        return max(bands) >= CONFIDENCE
+
+    def _update(self, posterior, item, answer):
+        likelihood = [
+            probability_yes(theta, item) if answer else 1 - probability_yes(theta, item) for theta in THETA_GRID
+        ]
+        return self._normalize([p * l for p, l in zip(posterior, likelihood)])
+
+    @staticmethod
+    def _normalize(weights):
+        total = sum(weights)
+        return [w / total for w in weights]
@@ -0,0 +1,189 @@
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_REQUESTS_PER_MINUTE = int(os.getenv("SENSAI_LLM_RPM", "120"))
+DEFAULT_TOKENS_PER_MINUTE = int(os.getenv("SENSAI_LLM_TPM", "400000"))
+
+# Rough prompt size in tokens, used until the API reports the real usage
+CHARS_PER_TOKEN = 4
+
+
+class AdmissionTimeout(TimeoutError):
+    """Raised when a request waited longer than its timeout for admission"""
+
+
+class TokenBucket:
+    """Refills ``rate_per_minute`` units per minute up to ``capacity``; the level may go negative on settlement"""
+
+    def __init__(self, rate_per_minute, capacity=None, level=None, updated=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.level = float(self.capacity if level is None else level)
+        self._updated = time.monotonic() if updated is None else updated
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount):
+        """Seconds until ``amount`` units are available (amounts above capacity wait for a full bucket)"""
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+
+class LocalBuckets:
+    """Request and token buckets held by this process alone"""
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def take(self, tokens):
+        """Take one request and ``tokens`` if both buckets cover them, else return the seconds to wait"""
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+        if wait == 0:
+            self.requests.level -= 1
+            self.tokens.level -= tokens
+        return wait
+
+    def settle(self, tokens):
+        self.tokens.level += tokens
+
+
+class SharedBuckets:
+    """Request and token buckets kept in SQLite, so every process using the database draws on one budget.
+
+    Each take reads, refills and debits both buckets inside one write
+    transaction, timed by the wall clock since the processes share no
+    monotonic one.
+    """
+
+    def __init__(self, path, requests_per_minute, tokens_per_minute):
+        self.rates = {"requests": requests_per_minute, "tokens": tokens_per_minute}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, level REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def take(self, tokens):
+        """Take one request and ``tokens`` if both buckets cover them, else return the seconds to wait"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = {
+                    name: (level, updated)
+                    for name, level, updated in self._conn.execute("SELECT name, level, updated FROM buckets")
+                }
+                buckets = {}
+                for name, rate in self.rates.items():
+                    level, updated = rows.get(name, (None, now))
+                    # A wall clock stepping back must not drain the bucket
+                    buckets[name] = TokenBucket(rate, level=level, updated=min(updated, now))
+                    buckets[name].refill(now)
+                wait = max(buckets["requests"].wait_time(1), buckets["tokens"].wait_time(tokens))
+                if wait == 0:
+                    buckets["requests"].level -= 1
+                    buckets["tokens"].level -= tokens
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO buckets (name, level, updated) VALUES (?, ?, ?)",
+                        [(name, bucket.level, now) for name, bucket in buckets.items()],
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def settle(self, tokens):
+        with self._lock:
+            self._conn.execute("UPDATE buckets SET level = level + ? WHERE name = 'tokens'", (tokens,))
+
+
+class AdmissionController:
+    """Global requests- and tokens-per-minute admission control for upstream LLM calls.
+
+    Callers are admitted in arrival order once both buckets can cover the
+    request and its estimated tokens; the estimate is settled against the
+    reported usage afterwards. Bursts therefore queue here instead of tripping
+    the provider's rate limits. With ``path`` the buckets live in that SQLite
+    database and the limits hold across every process using it; arrival order
+    is kept per process.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+        tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE,
+        path=None,
+    ):
+        if path is None:
+            self.buckets = LocalBuckets(requests_per_minute, tokens_per_minute)
+        else:
+            self.buckets = SharedBuckets(path, requests_per_minute, tokens_per_minute)
+        self._condition = threading.Condition()
+        self._queue = []
+        self.admitted = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+        self.wait_seconds = 0.0
+
+    @staticmethod
+    def estimate(prompt, max_tokens):
+        return len(prompt) // CHARS_PER_TOKEN + max_tokens
+
+    @property
+    def queue_depth(self):
+        return len(self._queue)
+
+    def acquire(self, tokens, timeout=None):
+        """Block until admitted, or raise AdmissionTimeout after ``timeout`` seconds"""
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        ticket = object()
+        with self._condition:
+            self._queue.append(ticket)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+            try:
+                while True:
+                    now = time.monotonic()
+                    # Only the head of the queue draws on the buckets; whoever is will notify once admitted
+                    wait = self.buckets.take(tokens) if self._queue[0] is ticket else None
+                    if wait == 0:
+                        self.admitted += 1
+                        self.wait_seconds += now - start
+                        return
+                    if deadline is not None and now >= deadline:
+                        self.rejected += 1
+                        raise AdmissionTimeout(f"Not admitted within {timeout}s ({len(self._queue)} queued)")
+                    if deadline is not None:
+                        wait = deadline - now if wait is None else min(wait, deadline - now)
+                    self._condition.wait(wait)
+            finally:
+                self._queue.remove(ticket)
+                self._condition.notify_all()
+
+    def settle(self, estimated, actual):
+        """Correct the token bucket once the real usage of an admitted request is known"""
+        if actual is None:
+            return
+        with self._condition:
+            self.buckets.settle(estimated - actual)
+            self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            return {
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self.max_queue_depth,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "wait_seconds": self.wait_seconds,
+            }
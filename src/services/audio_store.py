@@ -0,0 +1,97 @@
+import hashlib
+import json
+import mmap
+import os
+import threading
+
+# Streamlit serves ./static next to app.py under app/static/ (server.enableStaticServing),
+# with the real audio/mpeg content type since 1.65
+STATIC_DIR = "static"
+AUDIO_DIR = os.path.join(STATIC_DIR, "audio")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class AudioStore:
+    """Content-addressed on-disk store for synthesized narration.
+
+    Clips are named by a hash of their text and voice settings, so identical
+    narration is synthesized once and shared by every session. Files live under
+    Streamlit's static folder and are served with HTTP range support, which lets
+    the player seek without re-sending the whole clip.
+    """
+
+    def __init__(self, root=AUDIO_DIR, max_bytes=DEFAULT_MAX_BYTES, extension="mp3"):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def make_key(text, **voice_settings):
+        payload = json.dumps({"text": text, **voice_settings}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.root, f"{key}.{self.extension}")
+
+    def url(self, key):
+        """Static URL of a clip, relative to the app root"""
+        return f"app/{self.path(key).replace(os.sep, '/')}"
+
+    def contains(self, key):
+        path = self.path(key)
+        if not os.path.exists(path):
+            return False
+        # Refresh the modification time so eviction is least recently used
+        os.utime(path)
+        return True
+
+    def put(self, key, data):
+        path = self.path(key)
+        # Write to a temporary name first so readers never see a partial clip
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._evict()
+        return self.url(key)
+
+    def read(self, key, start=0, end=None):
+        """Return bytes [start, end) of a clip through a memory map"""
+        with open(self.path(key), "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return mapped[start:end]
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            total = 0
+            with os.scandir(self.root) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.endswith(f".{self.extension}"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+                        total += stat.st_size
+
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except FileNotFoundError:
+                    pass
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_audio_store():
+    """Return the shared audio store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = AudioStore()
+    return _store
@@ -0,0 +1,188 @@
+import networkx as nx
+
+
+class LearningPathGraph:
+    """Prerequisite DAG of learning path topics with incrementally maintained orderings.
+
+    The topological order, per-topic levels (length of the longest
+    prerequisite chain) and the set of topics ready to study are computed once
+    and then patched locally on each change, so adding a topic, adding a
+    prerequisite or marking a topic done does not rebuild the whole graph.
+    ``version`` increases with every structural change so derived data such as
+    layouts can be cached against it.
+    """
+
+    def __init__(self):
+        self.graph = nx.DiGraph()
+        self.version = 0
+        self._order = []
+        self._position = {}
+        self._levels = {}
+        self._available = set()
+        self._layout = None
+        self._layout_version = None
+
+    @classmethod
+    def from_topics(cls, topics):
+        """Build from ``[{"title": ..., "prerequisites": [...]}]``; only earlier topics count as prerequisites"""
+        path = cls()
+        for topic in topics:
+            known = [p for p in topic.get("prerequisites", []) if p in path.graph]
+            path.graph.add_node(topic["title"], done=False)
+            path.graph.add_edges_from((p, topic["title"]) for p in known)
+
+        index = {title: i for i, title in enumerate(path.graph.nodes)}
+        path._order = list(nx.lexicographical_topological_sort(path.graph, key=index.get))
+        path._position = {title: i for i, title in enumerate(path._order)}
+        for title in path._order:
+            path._levels[title] = path._level_from_prerequisites(title)
+        path._available = {title for title in path._order if path._is_available(title)}
+        return path
+
+    def to_dict(self):
+        """Plain-data form: topics in topological order with their prerequisites, and the done topics"""
+        return {
+            "topics": [{"title": title, "prerequisites": self.prerequisites(title)} for title in self._order],
+            "done": [title for title in self._order if self.is_done(title)],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        path = cls.from_topics(data["topics"])
+        for title in data.get("done", []):
+            path.mark_done(title)
+        return path
+
+    def order(self):
+        return list(self._order)
+
+    def levels(self):
+        return dict(self._levels)
+
+    def by_level(self):
+        """Topics grouped by level, each group in topological order"""
+        groups = {}
+        for title in self._order:
+            groups.setdefault(self._levels[title], []).append(title)
+        return [groups[level] for level in sorted(groups)]
+
+    def layout(self):
+        """Node positions ``{title: (x, y)}``, computed once per graph version.
+
+        Levels run top to bottom; within a level topics are ordered by the mean
+        position of their prerequisites, which keeps most edges from crossing.
+        """
+        if self._layout_version != self.version:
+            positions = {}
+            for level, titles in enumerate(self.by_level()):
+                titles.sort(key=lambda t: _mean(positions[p][0] for p in self.graph.predecessors(t)))
+                offset = (len(titles) - 1) / 2
+                for i, title in enumerate(titles):
+                    positions[title] = (i - offset, -level)
+            self._layout = positions
+            self._layout_version = self.version
+        return self._layout
+
+    def available(self):
+        """Topics not yet done whose prerequisites are all done"""
+        return [title for title in self._order if title in self._available]
+
+    def is_done(self, title):
+        return self.graph.nodes[title]["done"]
+
+    def prerequisites(self, title):
+        return list(self.graph.predecessors(title))
+
+    def add_topic(self, title, prerequisites=()):
+        """Add a topic, e.g. a follow-up question, placing it right after its last prerequisite"""
+        if title in self.graph:
+            for prerequisite in prerequisites:
+                self.add_prerequisite(title, prerequisite)
+            return
+
+        prerequisites = [p for p in prerequisites if p in self.graph]
+        self.graph.add_node(title, done=False)
+        self.graph.add_edges_from((p, title) for p in prerequisites)
+
+        # A node with only incoming edges can go anywhere after its prerequisites
+        insert_at = max((self._position[p] for p in prerequisites), default=len(self._order) - 1) + 1
+        self._order.insert(insert_at, title)
+        self._reindex(insert_at, len(self._order) - 1)
+        self._levels[title] = self._level_from_prerequisites(title)
+        if self._is_available(title):
+            self._available.add(title)
+        self.version += 1
+
+    def add_prerequisite(self, title, prerequisite):
+        """Require ``prerequisite`` before ``title``; raises ValueError if that would create a cycle"""
+        if self.graph.has_edge(prerequisite, title):
+            return
+        if title == prerequisite or nx.has_path(self.graph, title, prerequisite):
+            raise ValueError(f"{prerequisite!r} cannot be a prerequisite of {title!r}: it depends on it")
+
+        self.graph.add_edge(prerequisite, title)
+        if self._position[prerequisite] > self._position[title]:
+            self._reorder(prerequisite, title)
+        self._propagate_levels(title)
+        if title in self._available and not self._is_available(title):
+            self._available.discard(title)
+        self.version += 1
+
+    def mark_done(self, title, done=True):
+        """Mark a topic done; only it and its direct successors are re-checked for availability"""
+        self.graph.nodes[title]["done"] = done
+        for node in [title, *self.graph.successors(title)]:
+            if self._is_available(node):
+                self._available.add(node)
+            else:
+                self._available.discard(node)
+
+    def _is_available(self, title):
+        nodes = self.graph.nodes
+        return not nodes[title]["done"] and all(nodes[p]["done"] for p in self.graph.predecessors(title))
+
+    def _level_from_prerequisites(self, title):
+        return max((self._levels[p] + 1 for p in self.graph.predecessors(title)), default=0)
+
+    def _propagate_levels(self, start):
+        """Recompute levels downstream of ``start``, stopping wherever a level is unchanged"""
+        frontier = [start]
+        while frontier:
+            title = frontier.pop()
+            level = self._level_from_prerequisites(title)
+            if self._levels.get(title) == level and title != start:
+                continue
+            self._levels[title] = level
+            frontier.extend(self.graph.successors(title))
+
+    def _reorder(self, prerequisite, title):
+        """Pearce-Kelly local reordering after adding an edge that points backwards in the order"""
+        lower, upper = self._position[title], self._position[prerequisite]
+        forward = self._reachable(title, self.graph.successors, lambda n: self._position[n] <= upper)
+        backward = self._reachable(prerequisite, self.graph.predecessors, lambda n: self._position[n] >= lower)
+
+        slots = sorted(self._position[n] for n in forward | backward)
+        moved = sorted(backward, key=self._position.get) + sorted(forward, key=self._position.get)
+        for slot, node in zip(slots, moved):
+            self._order[slot] = node
+        self._reindex(slots[0], slots[-1])
+
+    @staticmethod
+    def _reachable(start, neighbours, within):
+        seen = {start}
+        stack = [start]
+        while stack:
+            for node in neighbours(stack.pop()):
+                if node not in seen and within(node):
+                    seen.add(node)
+                    stack.append(node)
+        return seen
+
+    def _reindex(self, start, end):
+        for i in range(start, end + 1):
+            self._position[self._order[i]] = i
+
+
+def _mean(values):
+    values = list(values)
+    return sum(values) / len(values) if values else 0.0
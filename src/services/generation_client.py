@@ -0,0 +1,96 @@
+import atexit
+import json
+import os
+import threading
+
+import httpx
+
+# Base URL of the shared generation API; unset means generate in this process
+API_URL = os.getenv("SENSAI_API_URL")
+
+
+class GenerationClient:
+    """Client for the generation API (api/main.py), over one pooled keep-alive connection set"""
+
+    def __init__(self, base_url, timeout=120.0, max_connections=32):
+        self._http_client = httpx.Client(
+            base_url=base_url.rstrip("/"),
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    def questions(self, topic):
+        """Yield the topic's question bank items as the API streams them in"""
+        with self._http_client.stream("POST", "/questions", json={"topic": topic}) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+    def learning_path(self, topic, questions, answers, level=None, timeout=None):
+        return self._post(
+            "/learning-path", timeout=timeout, topic=topic, questions=questions, answers=answers, level=level
+        )["topics"]
+
+    def prefetch_learning_path(self, topic, questions, answers, level=None):
+        """Have the API start generating a path without waiting for it"""
+        self._post("/learning-path/prefetch", topic=topic, questions=questions, answers=answers, level=level)
+
+    def slide(self, topic, subtopic, timeout=None):
+        return self._post("/slides", timeout=timeout, topic=topic, subtopic=subtopic)["markdown"]
+
+    def narration(self, markdown):
+        return self._post("/narration", markdown=markdown)
+
+    def close(self):
+        self._http_client.close()
+
+    def _post(self, path, timeout=None, **payload):
+        """POST ``payload``; ``timeout`` overrides the client's default for this request"""
+        response = self._http_client.post(
+            path, json=payload, timeout=httpx.USE_CLIENT_DEFAULT if timeout is None else timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+class RemoteNarration:
+    """Narration synthesized by the generation API, with the same interface as NarrationStream"""
+
+    def __init__(self, client, markdown):
+        self.client = client
+        self.markdown = markdown
+        response = client.narration(markdown)
+        self.chunk_urls = response["chunk_urls"]
+        self._clip_url = response["clip_url"]
+
+    def __iter__(self):
+        # The player retries a chunk until the API has written it, so URLs can be handed out right away
+        return iter(self.chunk_urls)
+
+    @property
+    def done(self):
+        return self._clip_url is not None
+
+    def clip_url(self):
+        if self._clip_url is None:
+            self._clip_url = self.client.narration(self.markdown)["clip_url"]
+        return self._clip_url
+
+    def cancel(self):
+        pass
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_generation_client():
+    """Return the shared API client, or None when SENSAI_API_URL is not configured"""
+    global _client
+    if API_URL and _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GenerationClient(API_URL)
+                atexit.register(_client.close)
+    return _client
@@ -0,0 +1,294 @@
+import atexit
+import hashlib
+import importlib
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+from src.services.metrics import current_trace_session, registry, set_trace_session
+from src.utils.paths import cache_path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Job kind -> "module:function" run by the worker processes with the job's keyword arguments
+JOB_HANDLERS = {
+    "learning_path": "src.services.path_generator:generate_personalized_path",
+    "slide": "src.services.slide_generator:generate_slide_content",
+}
+
+DEFAULT_WORKERS = int(os.getenv("SENSAI_JOB_WORKERS", "2"))
+
+# A running job whose worker has not finished it within this many seconds is handed to another worker
+LEASE_SECONDS = 300
+
+# Lower values are claimed first: work a user is waiting on, then prefetching
+PRIORITY_INTERACTIVE = 0
+PRIORITY_PREFETCH = 1
+
+# Finished results are reused for identical submissions for this long
+RESULT_TTL = 3600
+
+# Finished and failed jobs are deleted this long after they finish, at most once per PRUNE_INTERVAL
+RETENTION_SECONDS = 24 * 3600
+PRUNE_INTERVAL = 60
+
+POLL_INTERVAL = 0.1
+MAX_POLL_INTERVAL = 1.0
+
+
+class JobFailed(RuntimeError):
+    """Raised when waiting on a job that failed in its worker"""
+
+
+class JobQueue:
+    """SQLite-backed queue of generation jobs run by a pool of worker processes.
+
+    Jobs are keyed by their kind and arguments, so submitting a job that is
+    already queued, running or recently finished returns the existing one
+    instead of doing the work twice; resubmitting a queued job at a higher
+    priority moves it up. Workers claim by priority, then age. Callers poll or
+    wait for results; the work itself never runs in the Streamlit script
+    thread, so reruns do not restart it.
+    """
+
+    def __init__(self, path=None, lease_seconds=LEASE_SECONDS):
+        self.path = path or cache_path("jobs.sqlite3")
+        self.lease_seconds = lease_seconds
+        self._pruned_at = 0.0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                priority INTEGER NOT NULL DEFAULT 1,
+                session_id TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority, created_at)")
+        # Latest metrics snapshot of each worker process, merged into its parent's /metrics
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS worker_metrics (
+                worker INTEGER PRIMARY KEY,
+                parent INTEGER,
+                snapshot TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+
+    @staticmethod
+    def make_key(kind, kwargs):
+        raw = json.dumps([kind, kwargs], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def submit(self, kind, priority=PRIORITY_INTERACTIVE, **kwargs):
+        """Queue a job unless an identical one is in flight or freshly done; returns the job id.
+
+        An identical job still pending is raised to ``priority`` if that is higher.
+        The submitting session's trace id travels with the job, so the worker's
+        LLM calls appear in that session's trace.
+        """
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind {kind!r}")
+
+        job_id = self.make_key(kind, kwargs)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO jobs (id, kind, payload, status, priority, session_id, created_at)
+                VALUES (?, ?, ?, 'pending', ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET status = 'pending', result = NULL, error = NULL,
+                    priority = excluded.priority, session_id = excluded.session_id,
+                    created_at = excluded.created_at, started_at = NULL, finished_at = NULL
+                WHERE status = 'failed' OR (status = 'done' AND finished_at < ?)""",
+                (job_id, kind, json.dumps(kwargs), priority, current_trace_session(), now, now - RESULT_TTL),
+            )
+            self._conn.execute(
+                "UPDATE jobs SET priority = ? WHERE id = ? AND status = 'pending' AND priority > ?",
+                (priority, job_id, priority),
+            )
+        return job_id
+
+    def poll(self, job_id):
+        """Return ``(status, result)``; status is pending, running, done, failed or None for unknown jobs"""
+        with self._lock:
+            row = self._conn.execute("SELECT status, result, error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None, None
+        status, result, error = row
+        if status == "done":
+            return status, json.loads(result)
+        return status, error
+
+    def wait(self, job_id, timeout=None, on_status=None):
+        """Block until the job finishes and return its result; ``on_status`` sees every status change"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        interval = POLL_INTERVAL
+        last_status = None
+        while True:
+            status, result = self.poll(job_id)
+            if status != last_status and on_status is not None:
+                on_status(status)
+            last_status = status
+            if status == "done":
+                return result
+            if status in ("failed", None):
+                raise JobFailed(result or f"Job {job_id} does not exist")
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Job {job_id} still {status} after {timeout}s")
+            time.sleep(interval)
+            interval = min(interval * 1.5, MAX_POLL_INTERVAL)
+
+    def claim(self, max_priority=PRIORITY_PREFETCH):
+        """Atomically take the most urgent, then oldest, runnable job, or return None.
+
+        Only jobs at ``max_priority`` or more urgent are taken, so a worker can
+        keep a slot free for interactive work.
+        Returns ``(job_id, kind, kwargs, session_id)``. Claiming also prunes
+        jobs that finished more than ``RETENTION_SECONDS`` ago.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if now - self._pruned_at >= PRUNE_INTERVAL:
+                    self._conn.execute(
+                        "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                        (now - RETENTION_SECONDS,),
+                    )
+                    self._pruned_at = now
+                row = self._conn.execute(
+                    """SELECT id, kind, payload, session_id FROM jobs
+                    WHERE (status = 'pending' OR (status = 'running' AND started_at < ?)) AND priority <= ?
+                    ORDER BY priority, created_at LIMIT 1""",
+                    (now - self.lease_seconds, max_priority),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (now, row[0])
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job_id, kind, payload, session_id = row
+        return job_id, kind, json.loads(payload), session_id
+
+    def withdraw(self, job_id):
+        """Drop a job that is still queued as a prefetch; one raised to interactive priority is kept"""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE id = ? AND status = 'pending' AND priority = ?", (job_id, PRIORITY_PREFETCH)
+            )
+
+    def finish(self, job_id, result=None, error=None):
+        status = "failed" if error is not None else "done"
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, json.dumps(result) if error is None else None, error, time.time(), job_id),
+            )
+
+    def run_next(self):
+        """Run one job in this process; returns False when the queue had nothing to do"""
+        job = self.claim()
+        if job is None:
+            return False
+        self.run(job)
+        return True
+
+    def run(self, job):
+        """Run a claimed job in the calling thread and store its result or error"""
+        job_id, kind, kwargs, session_id = job
+        set_trace_session(session_id)
+        module_name, function_name = JOB_HANDLERS[kind].split(":")
+        try:
+            handler = getattr(importlib.import_module(module_name), function_name)
+            self.finish(job_id, result=handler(**kwargs))
+        except Exception as e:
+            logging.error(f"Job {kind} {job_id[:12]} failed: {e}")
+            self.finish(job_id, error=str(e) or type(e).__name__)
+
+    def publish_metrics(self, worker, parent, snapshot):
+        """Store the metrics snapshot of worker process ``worker``"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO worker_metrics (worker, parent, snapshot, updated_at) VALUES (?, ?, ?, ?)",
+                (worker, parent, json.dumps(snapshot), time.time()),
+            )
+
+    def worker_metrics(self, parent):
+        """Metrics snapshots of the workers started by process ``parent``, including ones that have exited"""
+        with self._lock:
+            rows = self._conn.execute("SELECT snapshot FROM worker_metrics WHERE parent = ?", (parent,)).fetchall()
+        return [json.loads(snapshot) for (snapshot,) in rows]
+
+    def stats(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+
+class WorkerPool:
+    """Local pool of job worker processes; each runs ``python -m src.services.job_worker``"""
+
+    def __init__(self, path, size=DEFAULT_WORKERS):
+        self.path = os.path.abspath(path)
+        self.size = size
+        self._processes = []
+
+    def start(self):
+        for _ in range(self.size):
+            self._processes.append(
+                subprocess.Popen(
+                    [sys.executable, "-m", "src.services.job_worker", "--db", self.path, "--parent", str(os.getpid())],
+                    cwd=ROOT,
+                )
+            )
+
+    def stop(self):
+        for process in self._processes:
+            process.terminate()
+        for process in self._processes:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self._processes.clear()
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Return the shared job queue, starting its local worker pool on first use"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                queue = JobQueue()
+                # Workers may also run elsewhere against the same database (SENSAI_JOB_WORKERS=0)
+                if DEFAULT_WORKERS > 0:
+                    pool = WorkerPool(queue.path)
+                    pool.start()
+                    atexit.register(pool.stop)
+                    parent = os.getpid()
+                    registry.register_source(lambda: queue.worker_metrics(parent))
+                _queue = queue
+    return _queue
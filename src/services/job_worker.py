@@ -0,0 +1,71 @@
+"""Worker process for the generation job queue: python -m src.services.job_worker [--db PATH]"""
+
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from dotenv import load_dotenv
+
+from src.services.job_queue import PRIORITY_INTERACTIVE, PRIORITY_PREFETCH, JobQueue
+from src.services.metrics import registry, start_metrics_server
+
+IDLE_SLEEP = 0.2
+
+# Jobs each worker process runs at once; they mostly wait on the LLM API, so threads are enough
+DEFAULT_CONCURRENCY = int(os.getenv("SENSAI_JOB_CONCURRENCY", "4"))
+
+
+def parent_alive(pid):
+    if pid is None:
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db", help="job database, defaults to the one in the cache directory")
+    parser.add_argument("--parent", type=int, help="exit once this process is gone")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="jobs run at once")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format=f"%(asctime)s worker-{os.getpid()} %(levelname)s %(message)s")
+    queue = JobQueue(args.db)
+    if args.parent is None:
+        # Standalone workers are scraped directly; pool workers report through their parent's /metrics
+        start_metrics_server()
+
+    def run(job):
+        queue.run(job)
+        if args.parent is not None:
+            queue.publish_metrics(os.getpid(), args.parent, registry.snapshot())
+
+    running = set()
+    with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="job") as executor:
+        while parent_alive(args.parent):
+            if len(running) >= args.concurrency:
+                _, running = wait(running, timeout=IDLE_SLEEP, return_when=FIRST_COMPLETED)
+                continue
+            running = {future for future in running if not future.done()}
+            # The last free slot only takes work a user is waiting on, so prefetching never delays it
+            reserved = args.concurrency > 1 and len(running) == args.concurrency - 1
+            job = queue.claim(max_priority=PRIORITY_INTERACTIVE if reserved else PRIORITY_PREFETCH)
+            if job is None:
+                time.sleep(IDLE_SLEEP)
+                continue
+            running.add(executor.submit(run, job))
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
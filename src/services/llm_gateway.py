@@ -0,0 +1,293 @@
+import asyncio
+import atexit
+import logging
+import os
+import random
+import threading
+import time
+
+import httpx
+from zai import ZaiClient
+
+from src.services.admission import AdmissionController
+from src.services.metrics import increment, registry
+from src.services.response_cache import get_response_cache
+from src.services.single_flight import SingleFlight
+from src.utils.paths import cache_path
+
+DEFAULT_MODEL = "glm-4.5"
+
+# Status codes worth another attempt: rate limiting and upstream failures
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMGateway:
+    """Process-wide access point to the z.ai chat completion API.
+
+    Owns a single ZaiClient backed by a pooled keep-alive HTTP client, so every
+    session reuses warm connections instead of paying client setup and a TLS
+    handshake per request. Identical concurrent requests share one upstream
+    call, and every upstream call passes a global rate admission controller.
+    """
+
+    def __init__(self, api_key=None, timeout=60.0, max_retries=2, backoff=0.5, max_connections=64):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        # Shared with the job workers and other replicas on this host, so the limits hold for all of them
+        self.admission = AdmissionController(path=cache_path("admission.sqlite3"))
+        self.single_flight = SingleFlight()
+
+        self._http_client = httpx.Client(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=60.0,
+            ),
+        )
+        # Retries are handled here so they can be bounded and jittered
+        self._client = ZaiClient(
+            api_key=api_key or os.getenv("ANTHROPIC_AUTH_TOKEN"),
+            timeout=timeout,
+            max_retries=0,
+            http_client=self._http_client,
+        )
+
+    def complete(
+        self,
+        prompt,
+        model=DEFAULT_MODEL,
+        max_tokens=2000,
+        temperature=0.7,
+        thinking=None,
+        timeout=None,
+        json_mode=False,
+        max_retries=None,
+        use_cache=False,
+        cache_if=None,
+        on_usage=None,
+        coalesce=True,
+    ):
+        """Return the text of a single-turn chat completion.
+
+        With ``use_cache`` the result is served from and stored in the shared
+        persistent response cache; ``cache_if`` can veto storing a result, e.g.
+        one that failed validation. ``on_usage`` is called with the token usage
+        (None if not reported) of every request that reached the API; callers
+        that joined an identical in-flight request (``coalesce``) see no usage.
+        """
+        cache = get_response_cache()
+        key = cache.make_key(model, prompt, temperature, max_tokens, thinking)
+        if use_cache:
+            content = cache.get(key)
+            increment("sensai_llm_cache_lookups_total", model=model, result="miss" if content is None else "hit")
+            if content is not None:
+                return content
+
+        def fetch():
+            response, usage = self._admitted(
+                self.admission.estimate(prompt, max_tokens),
+                messages=[{"role": "user", "content": prompt}],
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                thinking=thinking,
+                timeout=timeout,
+                json_mode=json_mode,
+                max_retries=max_retries,
+            )
+            if on_usage is not None:
+                on_usage(usage)
+            content = response.choices[0].message.content
+            if use_cache and content and (cache_if is None or cache_if(content)):
+                cache.set(key, content)
+            return content
+
+        if not coalesce:
+            return fetch()
+        return self.single_flight.do((key, json_mode), fetch, timeout=timeout or self.timeout)
+
+    async def acomplete(self, prompt, **kwargs):
+        """Async variant of complete(); runs the blocking call off the event loop"""
+        return await asyncio.to_thread(self.complete, prompt, **kwargs)
+
+    def stream(
+        self,
+        prompt,
+        model=DEFAULT_MODEL,
+        max_tokens=2000,
+        temperature=0.7,
+        thinking=None,
+        timeout=None,
+        json_mode=False,
+        max_retries=None,
+        use_cache=False,
+        cache_if=None,
+        on_usage=None,
+        coalesce=True,
+    ):
+        """Yield the text of a single-turn chat completion as chunks arrive.
+
+        A cache hit yields the stored completion as a single chunk; a fully
+        streamed completion is written back to the cache unless ``cache_if``
+        rejects it. Concurrent identical streams share one upstream request,
+        each seeing every chunk, unless ``coalesce`` is off.
+        """
+        cache = get_response_cache()
+        key = cache.make_key(model, prompt, temperature, max_tokens, thinking)
+        if use_cache:
+            content = cache.get(key)
+            increment("sensai_llm_cache_lookups_total", model=model, result="miss" if content is None else "hit")
+            if content is not None:
+                yield content
+                return
+
+        def produce():
+            estimate = self.admission.estimate(prompt, max_tokens)
+            self.admission.acquire(estimate, timeout=timeout or self.timeout)
+            parts = []
+            usage = None
+            try:
+                response = self.create(
+                    messages=[{"role": "user", "content": prompt}],
+                    model=model,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    thinking=thinking,
+                    timeout=timeout,
+                    json_mode=json_mode,
+                    max_retries=max_retries,
+                    stream=True,
+                )
+                for chunk in response:
+                    # Usage, when reported, arrives on the final chunk
+                    usage = getattr(chunk, "usage", None) or usage
+                    if not chunk.choices:
+                        continue
+                    # Reasoning tokens arrive in a separate field and are not part of the answer
+                    text = getattr(chunk.choices[0].delta, "content", None)
+                    if text:
+                        parts.append(text)
+                        yield text
+            finally:
+                self.admission.settle(estimate, total_tokens(usage))
+
+            if on_usage is not None:
+                on_usage(usage)
+            content = "".join(parts)
+            if use_cache and content and (cache_if is None or cache_if(content)):
+                cache.set(key, content)
+
+        if not coalesce:
+            yield from produce()
+            return
+        yield from self.single_flight.stream((key, json_mode), produce, timeout=timeout or self.timeout)
+
+    def create(
+        self,
+        messages,
+        model=DEFAULT_MODEL,
+        max_tokens=2000,
+        temperature=0.7,
+        thinking=None,
+        timeout=None,
+        json_mode=False,
+        max_retries=None,
+        stream=False,
+    ):
+        """Call chat.completions.create with a per-call timeout and bounded, jittered retries"""
+        max_retries = self.max_retries if max_retries is None else max_retries
+        params = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "timeout": timeout or self.timeout,
+        }
+        if stream:
+            params["stream"] = True
+        if json_mode:
+            params["response_format"] = {"type": "json_object"}
+        if thinking is not None:
+            params["thinking"] = {"type": "enabled" if thinking else "disabled"}
+
+        attempt = 0
+        while True:
+            try:
+                return self._client.chat.completions.create(**params)
+            except Exception as e:
+                if attempt >= max_retries or not self._is_retryable(e):
+                    raise
+                delay = random.uniform(0, self.backoff * 2**attempt)
+                attempt += 1
+                logging.warning(f"LLM request failed ({e}), retry {attempt}/{max_retries} in {delay:.2f}s")
+                time.sleep(delay)
+
+    def _admitted(self, estimate, **params):
+        """create() once the rate controller admits ``estimate`` tokens; returns the response and its usage"""
+        self.admission.acquire(estimate, timeout=params.get("timeout") or self.timeout)
+        usage = None
+        try:
+            response = self.create(**params)
+            usage = getattr(response, "usage", None)
+            return response, usage
+        finally:
+            self.admission.settle(estimate, total_tokens(usage))
+
+    async def acreate(self, messages, **kwargs):
+        """Async variant of create()"""
+        return await asyncio.to_thread(self.create, messages, **kwargs)
+
+    def close(self):
+        self._http_client.close()
+
+    @staticmethod
+    def is_timeout(error):
+        # Also covers waiting too long for admission or for a coalesced request
+        if isinstance(error, (httpx.TimeoutException, TimeoutError)):
+            return True
+        return type(error).__name__ == "APITimeoutError"
+
+    @staticmethod
+    def _is_retryable(error):
+        if isinstance(error, (httpx.TimeoutException, httpx.TransportError)):
+            return True
+        # The SDK wraps transport failures in its own APITimeoutError/APIConnectionError
+        if type(error).__name__ in ("APITimeoutError", "APIConnectionError"):
+            return True
+        status_code = getattr(error, "status_code", None)
+        return status_code in RETRYABLE_STATUS_CODES
+
+
+def total_tokens(usage):
+    if usage is None:
+        return None
+    total = getattr(usage, "total_tokens", None)
+    if total is None:
+        total = (getattr(usage, "prompt_tokens", 0) or 0) + (getattr(usage, "completion_tokens", 0) or 0)
+    return total
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """Return the shared gateway, creating it on first use"""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway()
+                atexit.register(_gateway.close)
+                registry.register_collector(_gateway_gauges)
+    return _gateway
+
+
+def _gateway_gauges():
+    """Admission and coalescing state of the shared gateway, sampled on every metrics scrape"""
+    gauges = [(f"sensai_llm_admission_{name}", {}, value) for name, value in _gateway.admission.stats().items()]
+    gauges.append(("sensai_llm_coalesced_calls", {}, _gateway.single_flight.shared))
+    gauges.append(("sensai_llm_in_flight", {}, _gateway.single_flight.in_flight()))
+    return gauges
@@ -0,0 +1,347 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Latency samples kept per series for percentile estimates
+WINDOW = 500
+
+# Histogram bucket upper bounds, Prometheus style
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+METRICS_PORT = int(os.getenv("SENSAI_METRICS_PORT", "9464"))
+
+# Directory for per-session JSONL traces; tracing is off when unset
+TRACE_DIR = os.getenv("SENSAI_TRACE_DIR")
+
+
+class StageMetrics:
+    """In-process latency and token metrics per generation stage and model"""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._series = defaultdict(self._new_series)
+
+    def _new_series(self):
+        return {
+            "calls": 0,
+            "overruns": 0,
+            "errors": 0,
+            "hedges": 0,
+            "deadline_misses": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "latencies": deque(maxlen=self.window),
+            "first_chunks": deque(maxlen=self.window),
+        }
+
+    def record(self, stage, model, latency, usage=None, overrun=False, error=False, first_chunk=None):
+        """Record a finished call; ``first_chunk`` is the time to first output of a streamed one"""
+        with self._lock:
+            series = self._series[(stage, model)]
+            series["calls"] += 1
+            series["overruns"] += int(overrun)
+            series["errors"] += int(error)
+            series["latencies"].append(latency)
+            if first_chunk is not None:
+                series["first_chunks"].append(first_chunk)
+            prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+            completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+            series["prompt_tokens"] += prompt_tokens
+            series["completion_tokens"] += completion_tokens
+
+        outcome = "overrun" if overrun else "error" if error else "ok"
+        observe("sensai_llm_request_seconds", latency, stage=stage, model=model, outcome=outcome)
+        if first_chunk is not None:
+            observe("sensai_llm_first_chunk_seconds", first_chunk, stage=stage, model=model)
+        if usage is not None:
+            observe("sensai_llm_prompt_tokens", prompt_tokens, TOKEN_BUCKETS, stage=stage, model=model)
+            observe("sensai_llm_completion_tokens", completion_tokens, TOKEN_BUCKETS, stage=stage, model=model)
+        trace(
+            "llm_call",
+            stage=stage,
+            model=model,
+            seconds=latency,
+            outcome=outcome,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+        )
+
+    def count(self, stage, model, event):
+        """Increment an event counter such as hedges or deadline_misses"""
+        with self._lock:
+            self._series[(stage, model)][event] += 1
+        increment(f"sensai_llm_{event}_total", stage=stage, model=model)
+
+    def samples(self, stage, model, kind="latencies"):
+        with self._lock:
+            return len(self._series[(stage, model)][kind])
+
+    def percentile(self, stage, model, q, kind="latencies"):
+        """Percentile ``q`` (0-1) of latency, or time to first chunk, over the recent window; None without samples"""
+        with self._lock:
+            latencies = sorted(self._series[(stage, model)][kind])
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    def summary(self):
+        with self._lock:
+            keys = list(self._series)
+        summary = {}
+        for stage, model in keys:
+            with self._lock:
+                series = dict(self._series[(stage, model)])
+            summary[f"{stage}/{model}"] = {
+                "calls": series["calls"],
+                "overruns": series["overruns"],
+                "errors": series["errors"],
+                "hedges": series["hedges"],
+                "deadline_misses": series["deadline_misses"],
+                "prompt_tokens": series["prompt_tokens"],
+                "completion_tokens": series["completion_tokens"],
+                "p50": self.percentile(stage, model, 0.5),
+                "p95": self.percentile(stage, model, 0.95),
+            }
+        return summary
+
+
+stage_metrics = StageMetrics()
+
+
+class MetricsRegistry:
+    """Process-wide histograms, counters and scrape-time gauges rendered in the Prometheus text format.
+
+    Other processes (the job workers) export their series as snapshots;
+    sources registered with register_source() are merged in on every render.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # name -> (bucket bounds, {labels: [bucket counts..., sum, count]})
+        self._histograms = {}
+        self._counters = defaultdict(lambda: defaultdict(float))
+        self._collectors = []
+        self._sources = []
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            bounds, series = self._histograms.setdefault(name, (buckets, {}))
+            counts = series.setdefault(key, [0] * (len(bounds) + 2))
+            for i, bound in enumerate(bounds):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def increment(self, name, amount=1, **labels):
+        with self._lock:
+            self._counters[name][tuple(sorted(labels.items()))] += amount
+
+    def register_collector(self, collect):
+        """Add ``collect()`` returning ``[(name, labels, value)]`` gauges evaluated on every scrape"""
+        with self._lock:
+            self._collectors.append(collect)
+
+    def register_source(self, snapshots):
+        """Add ``snapshots()`` returning snapshots of other processes' registries, merged in on every scrape"""
+        with self._lock:
+            self._sources.append(snapshots)
+
+    def snapshot(self):
+        """JSON-serializable copy of the histograms and counters"""
+        with self._lock:
+            return {
+                "histograms": {
+                    name: [list(bounds), [[list(labels), list(counts)] for labels, counts in series.items()]]
+                    for name, (bounds, series) in self._histograms.items()
+                },
+                "counters": {
+                    name: [[list(labels), value] for labels, value in series.items()]
+                    for name, series in self._counters.items()
+                },
+            }
+
+    def merge(self, snapshot):
+        """Add the series of a snapshot to this registry"""
+        with self._lock:
+            for name, (bounds, series) in snapshot["histograms"].items():
+                own_bounds, own_series = self._histograms.setdefault(name, (tuple(bounds), {}))
+                if list(own_bounds) != list(bounds):
+                    logging.warning(f"Skipping {name} from a snapshot with different buckets")
+                    continue
+                for labels, counts in series:
+                    key = tuple(tuple(pair) for pair in labels)
+                    own = own_series.setdefault(key, [0] * len(counts))
+                    for i, count in enumerate(counts):
+                        own[i] += count
+            for name, series in snapshot["counters"].items():
+                for labels, value in series:
+                    self._counters[name][tuple(tuple(pair) for pair in labels)] += value
+
+    def render(self):
+        with self._lock:
+            sources = list(self._sources)
+        if not sources:
+            return self._render()
+
+        combined = MetricsRegistry()
+        combined.merge(self.snapshot())
+        for snapshots in sources:
+            try:
+                for snapshot in snapshots():
+                    combined.merge(snapshot)
+            except Exception as e:
+                logging.warning(f"Metrics source failed: {e}")
+        with self._lock:
+            combined._collectors = list(self._collectors)
+        return combined._render()
+
+    def _render(self):
+        lines = []
+        with self._lock:
+            histograms = {
+                name: (bounds, {labels: list(counts) for labels, counts in series.items()})
+                for name, (bounds, series) in self._histograms.items()
+            }
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            collectors = list(self._collectors)
+
+        for name, (bounds, series) in sorted(histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            for labels, counts in series.items():
+                # Buckets are cumulative: counts[i] already includes every smaller observation
+                for bound, count in zip(bounds, counts):
+                    lines.append(f"{name}_bucket{_labels(labels, le=bound)} {count}")
+                lines.append(f'{name}_bucket{_labels(labels, le="+Inf")} {counts[-1]}')
+                lines.append(f"{name}_sum{_labels(labels)} {counts[-2]}")
+                lines.append(f"{name}_count{_labels(labels)} {counts[-1]}")
+
+        for name, series in sorted(counters.items()):
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in series.items():
+                lines.append(f"{name}{_labels(labels)} {value:g}")
+
+        gauges = defaultdict(list)
+        for collect in collectors:
+            try:
+                for name, labels, value in collect():
+                    gauges[name].append((tuple(sorted(labels.items())), value))
+            except Exception as e:
+                logging.warning(f"Metrics collector failed: {e}")
+        for name, series in sorted(gauges.items()):
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in series:
+                lines.append(f"{name}{_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (f'{key}="{_escape(value)}"' for key, value in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+
+_trace_session = contextvars.ContextVar("trace_session", default=None)
+_trace_lock = threading.Lock()
+
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    registry.observe(name, value, buckets, **labels)
+
+
+def increment(name, amount=1, **labels):
+    registry.increment(name, amount, **labels)
+
+
+def record_fallback(kind):
+    """Count the use of canned content in place of a generation that failed"""
+    increment("sensai_fallbacks_total", kind=kind)
+    trace("fallback", kind=kind)
+
+
+def set_trace_session(session_id):
+    """Attribute trace events from the current script run (or job) to ``session_id``"""
+    _trace_session.set(session_id)
+
+
+def current_trace_session():
+    return _trace_session.get()
+
+
+def trace(event, **fields):
+    """Append an event to the current session's JSONL trace when SENSAI_TRACE_DIR is set"""
+    session_id = _trace_session.get()
+    if not TRACE_DIR or session_id is None:
+        return
+    line = json.dumps({"ts": time.time(), "event": event, **fields}, default=str)
+    with _trace_lock:
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        with open(os.path.join(TRACE_DIR, f"{session_id}.jsonl"), "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+@contextmanager
+def timed(name, **labels):
+    """Observe the wall time of the block in the ``sensai_<name>_seconds`` histogram and the session trace"""
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        seconds = time.monotonic() - start
+        observe(f"sensai_{name}_seconds", seconds, **labels)
+        trace(name, seconds=seconds, **labels)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=METRICS_PORT):
+    """Serve /metrics on ``port`` from a background thread, once per process; port 0 disables it"""
+    global _server
+    if not port or _server is not None:
+        return
+    with _server_lock:
+        if _server is not None:
+            return
+        try:
+            _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+        except OSError as e:
+            logging.warning(f"Metrics endpoint not started on port {port}: {e}")
+            _server = False
+            return
+        threading.Thread(target=_server.serve_forever, daemon=True, name="metrics-server").start()
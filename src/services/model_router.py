@@ -0,0 +1,259 @@
+import contextvars
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from src.services.llm_gateway import LLMGateway, get_gateway
+from src.services.metrics import stage_metrics
+
+MODEL_TIERS = {
+    "quality": {"model": "glm-4.5", "thinking": True},
+    "balanced": {"model": "glm-4.5-air", "thinking": False},
+    "fast": {"model": "glm-4.5-flash", "thinking": False},
+}
+
+# Each stage tries its tiers in order; every tier but the last is cut off at the stage's budget.
+# The deadline bounds the whole call, fallbacks and hedges included.
+STAGES = {
+    "diagnostic_questions": {"budget": 8.0, "deadline": 20.0, "tiers": ["balanced", "fast"], "max_tokens": 2048},
+    "learning_path": {"budget": 12.0, "deadline": 25.0, "tiers": ["quality", "balanced", "fast"], "max_tokens": 2000},
+    "slides": {"budget": 15.0, "deadline": 30.0, "tiers": ["balanced", "fast"], "max_tokens": 1500},
+    "tutor": {"budget": 6.0, "deadline": 10.0, "tiers": ["fast"], "max_tokens": 800},
+}
+
+# Hedge once a request outlasts this latency percentile, given enough samples to trust it
+HEDGE_PERCENTILE = 0.95
+HEDGE_MIN_SAMPLES = 20
+
+_hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+
+# Marks a stream that ended without producing output
+_END = object()
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a stage's hard deadline expires before any response arrived"""
+
+
+def load_stage_config():
+    """Stage configuration, with overrides from the JSON file named by SENSAI_STAGE_CONFIG"""
+    stages = {name: dict(config) for name, config in STAGES.items()}
+    path = os.getenv("SENSAI_STAGE_CONFIG")
+    if path:
+        with open(path) as f:
+            for name, overrides in json.load(f).items():
+                stages.setdefault(name, {}).update(overrides)
+    return stages
+
+
+class ModelRouter:
+    """Routes each generation stage to a model tier within a latency budget.
+
+    When a tier overruns the stage budget the request falls back to the next,
+    faster tier. A request slower than the observed p95 is hedged with a
+    duplicate and the first response wins, and every call resolves or raises
+    DeadlineExceeded by the stage's hard deadline so callers can fall back.
+    Latency and token usage are recorded per stage and model.
+    """
+
+    def __init__(self, stages=None):
+        self.stages = stages or load_stage_config()
+
+    def attempts(self, stage):
+        """(tier settings, timeout, is last tier) for each tier of ``stage``, in order"""
+        config = self.stages[stage]
+        tiers = config["tiers"]
+        for i, name in enumerate(tiers):
+            last = i == len(tiers) - 1
+            settings = {**MODEL_TIERS[name], "max_tokens": config["max_tokens"]}
+            yield settings, None if last else config["budget"], last
+
+    def complete(self, stage, prompt, **kwargs):
+        deadline = time.monotonic() + self.stages[stage]["deadline"]
+        for settings, budget, last in self.attempts(stage):
+            remaining = self._remaining(stage, settings, deadline)
+            timeout = min(budget or remaining, remaining)
+
+            def call(coalesce=True, settings=settings, timeout=timeout, last=last):
+                return self._complete_once(stage, prompt, settings, timeout, last, dict(kwargs, coalesce=coalesce))
+
+            try:
+                return self._race(stage, settings["model"], call, deadline, deadline)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                if last or not LLMGateway.is_timeout(e):
+                    raise
+                logging.warning(f"{stage} overran {budget}s on {settings['model']}, falling back")
+
+    def stream(self, stage, prompt, **kwargs):
+        """Stream a completion; a tier is abandoned only if it overruns before producing output.
+
+        Waiting for the first chunk is hedged like complete(): past the observed
+        p95 time to first chunk a duplicate stream is opened and whichever
+        produces output first is kept. Both the wait and the stream stop with
+        DeadlineExceeded once the stage's deadline passes.
+        """
+        deadline = time.monotonic() + self.stages[stage]["deadline"]
+        for settings, budget, last in self.attempts(stage):
+            remaining = self._remaining(stage, settings, deadline)
+            timeout = min(budget or remaining, remaining)
+            start = time.monotonic()
+
+            def open_stream(coalesce=True, settings=settings, timeout=timeout, last=last):
+                usage = []
+                chunks = get_gateway().stream(
+                    prompt,
+                    timeout=timeout,
+                    max_retries=None if last else 0,
+                    on_usage=usage.append,
+                    coalesce=coalesce,
+                    **settings,
+                    **kwargs,
+                )
+                return chunks, usage, next(chunks, _END)
+
+            try:
+                chunks, usage, first = self._race(
+                    stage,
+                    settings["model"],
+                    open_stream,
+                    min(start + timeout, deadline),
+                    deadline,
+                    kind="first_chunks",
+                    # A running generator cannot be closed, so a losing stream is closed once its first read returns
+                    on_lose=lambda stream: stream[0].close(),
+                )
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                self._record(stage, settings, start, [], error=e)
+                if last or not LLMGateway.is_timeout(e):
+                    raise
+                logging.warning(f"{stage} overran {budget}s on {settings['model']}, falling back")
+                continue
+
+            first_chunk = time.monotonic() - start
+            try:
+                if first is not _END:
+                    yield first
+                    for chunk in chunks:
+                        if time.monotonic() > deadline:
+                            stage_metrics.count(stage, settings["model"], "deadline_misses")
+                            raise DeadlineExceeded(f"{stage} stream passed its deadline")
+                        yield chunk
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                # Output has started, so falling back would repeat it
+                self._record(stage, settings, start, usage, error=e)
+                raise
+            self._record(stage, settings, start, usage, first_chunk=first_chunk)
+            return
+
+    def _complete_once(self, stage, prompt, settings, timeout, last, kwargs):
+        start = time.monotonic()
+        usage = []
+        try:
+            content = get_gateway().complete(
+                prompt,
+                timeout=timeout,
+                max_retries=None if last else 0,
+                on_usage=usage.append,
+                **settings,
+                **kwargs,
+            )
+        except Exception as e:
+            self._record(stage, settings, start, usage, error=e)
+            raise
+        self._record(stage, settings, start, usage)
+        return content
+
+    def _race(self, stage, model, first_result, give_up, deadline, kind="latencies", on_lose=None):
+        """Race ``first_result`` against a duplicate started past the observed p95 and keep the first success.
+
+        ``first_result(coalesce)`` produces what the caller waits for: the whole
+        completion, or an opened stream with its first chunk. Results of the
+        losing attempts are handed to ``on_lose`` as they arrive. Raises
+        TimeoutError at ``give_up``, or DeadlineExceeded if that is the deadline.
+        """
+        hedge_at = None
+        if stage_metrics.samples(stage, model, kind) >= HEDGE_MIN_SAMPLES:
+            hedge_at = time.monotonic() + stage_metrics.percentile(stage, model, HEDGE_PERCENTILE, kind)
+
+        def begin(coalesce):
+            # Attempts run in the caller's context so their metrics land in the caller's session trace
+            return _hedge_executor.submit(contextvars.copy_context().run, first_result, coalesce)
+
+        def abandon(futures):
+            if on_lose is not None:
+                for future in futures:
+                    future.add_done_callback(lambda f: f.exception() is None and on_lose(f.result()))
+
+        pending = {begin(True)}
+        error = None
+        while pending:
+            now = time.monotonic()
+            if now >= give_up:
+                abandon(pending)
+                if give_up >= deadline:
+                    stage_metrics.count(stage, model, "deadline_misses")
+                    raise DeadlineExceeded(f"{stage} produced no result before its deadline")
+                raise TimeoutError(f"{stage} produced no result on {model} within its budget")
+
+            timeout = give_up - now
+            if hedge_at is not None:
+                timeout = min(timeout, max(0.0, hedge_at - now))
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    abandon(pending)
+                    return future.result()
+                error = future.exception()
+
+            if hedge_at is not None and pending and time.monotonic() >= hedge_at:
+                hedge_at = None
+                stage_metrics.count(stage, model, "hedges")
+                # The duplicate must not join the original through single-flight coalescing
+                pending.add(begin(False))
+        raise error
+
+    @staticmethod
+    def _remaining(stage, settings, deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            stage_metrics.count(stage, settings["model"], "deadline_misses")
+            raise DeadlineExceeded(f"{stage} passed its deadline")
+        return remaining
+
+    def _record(self, stage, settings, start, usage, error=None, first_chunk=None):
+        if error is None and not usage:
+            # Served from the response cache; keep upstream latency samples clean
+            return
+        stage_metrics.record(
+            stage,
+            settings["model"],
+            time.monotonic() - start,
+            usage[-1] if usage else None,
+            overrun=error is not None and LLMGateway.is_timeout(error),
+            error=error is not None,
+            first_chunk=first_chunk,
+        )
+
+
+_router = None
+
+
+def get_router():
+    global _router
+    if _router is None:
+        _router = ModelRouter()
+    return _router
+
+
+def stage_deadline(stage):
+    """Seconds within which ``stage`` resolves or falls back; callers waiting on it elsewhere stop waiting then"""
+    return get_router().stages[stage]["deadline"]
@@ -0,0 +1,153 @@
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from elevenlabs.client import ElevenLabs
+
+from src.services.audio_store import get_audio_store
+
+DEFAULT_VOICE_ID = "JBFqnCBsd6RMkjVDRZzb"
+DEFAULT_MODEL_ID = "eleven_multilingual_v2"
+DEFAULT_OUTPUT_FORMAT = "mp3_44100_128"
+
+# Roughly 20-30 seconds of speech per synthesized chunk
+MAX_CHUNK_CHARS = 400
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="narration")
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the shared ElevenLabs client, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ElevenLabs(api_key=os.getenv("ELEVENLABS_KEY"))
+    return _client
+
+
+def narration_script(markdown):
+    """Turn slide markdown into plain text suitable for speech"""
+    sentences = []
+    for line in markdown.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        line = re.sub(r"^(#+|-|\*|\d+\.)\s*", "", line)
+        line = line.replace("**", "").replace("`", "").rstrip(":").strip()
+        if not line:
+            continue
+        # Headers and bullets are spoken as separate sentences
+        if line[-1] not in ".!?":
+            line += "."
+        sentences.append(line)
+    return " ".join(sentences)
+
+
+def split_sentences(text):
+    return [sentence for sentence in SENTENCE_END.split(text) if sentence.strip()]
+
+
+def chunk_sentences(sentences, max_chars=MAX_CHUNK_CHARS):
+    """Group consecutive sentences into chunks of at most ``max_chars`` characters"""
+    chunks = []
+    current = ""
+    for sentence in sentences:
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class NarrationStream:
+    """Synthesizes a slide's narration chunk by chunk in parallel.
+
+    Every chunk is stored in the content-addressed audio store, so its URL is
+    known before synthesis finishes and chunks already produced by any session
+    are reused. Chunks are handed out strictly in script order, so playback can
+    start as soon as the first one is ready.
+    """
+
+    def __init__(self, markdown, voice_id=None, model_id=DEFAULT_MODEL_ID, output_format=DEFAULT_OUTPUT_FORMAT):
+        self.voice_settings = {
+            "voice_id": voice_id or os.getenv("ELEVENLABS_VOICE_ID", DEFAULT_VOICE_ID),
+            "model_id": model_id,
+            "output_format": output_format,
+        }
+        self.script = narration_script(markdown)
+        self.texts = chunk_sentences(split_sentences(self.script))
+
+        store = get_audio_store()
+        self.keys = [store.make_key(text, **self.voice_settings) for text in self.texts]
+        self.clip_key = store.make_key(self.script, **self.voice_settings)
+        self._futures = [_executor.submit(self._synthesize, i) for i in range(len(self.texts))]
+
+    def __iter__(self):
+        """Yield chunk URLs in order, each as soon as it and all before it are ready"""
+        for future in self._futures:
+            url = future.result()
+            if url:
+                yield url
+
+    @property
+    def chunk_urls(self):
+        store = get_audio_store()
+        return [store.url(key) for key in self.keys]
+
+    @property
+    def done(self):
+        return all(future.done() for future in self._futures)
+
+    def clip_url(self):
+        """URL of the complete narration once every chunk is synthesized, else None"""
+        store = get_audio_store()
+        if store.contains(self.clip_key):
+            return store.url(self.clip_key)
+        if not self.done:
+            return None
+
+        # MP3 frames can be concatenated directly
+        chunks = []
+        for index, (future, key) in enumerate(zip(self._futures, self.keys)):
+            if not future.result():
+                continue
+            try:
+                chunks.append(store.read(key))
+            except FileNotFoundError:
+                # Evicted since it was synthesized; synthesize it again
+                if self._synthesize(index):
+                    chunks.append(store.read(key))
+        return store.put(self.clip_key, b"".join(chunks)) if chunks else None
+
+    def cancel(self):
+        for future in self._futures:
+            future.cancel()
+
+    def _synthesize(self, index):
+        store = get_audio_store()
+        key = self.keys[index]
+        if store.contains(key):
+            return store.url(key)
+
+        try:
+            # Neighbouring text keeps the intonation consistent across chunk boundaries
+            audio = get_client().text_to_speech.convert(
+                text=self.texts[index],
+                previous_text=self.texts[index - 1] if index > 0 else None,
+                next_text=self.texts[index + 1] if index + 1 < len(self.texts) else None,
+                **self.voice_settings,
+            )
+            return store.put(key, b"".join(audio))
+        except Exception as e:
+            logging.error(f"Failed to synthesize narration chunk {index}: {e}")
+            return None
@@ -0,0 +1,107 @@
+from src.services.metrics import record_fallback
+from src.services.structured_output import generate_items
+from src.utils.schemas import PathTopic
+
+MIN_PATH_TOPICS = 4
+MAX_PATH_TOPICS = 6
+
+
+def knowledge_level(answers):
+    """Share of questions answered YES (0.5 when there are no answers)"""
+    yes_count = sum(1 for answer in answers if answer)
+    return yes_count / len(answers) if answers else 0.5
+
+
+def path_profile(topic, questions, answers, level=None):
+    """The parts of the quiz results the path prompt actually depends on.
+
+    Only the knowledge level and the first three YES and NO questions reach
+    the prompt, so answer vectors with the same profile share one path.
+    ``level`` defaults to the YES ratio when no ability estimate is given.
+    """
+    if level is None:
+        level = knowledge_level(answers)
+    yes_questions = tuple(q for q, a in zip(questions, answers) if a)
+    no_questions = tuple(q for q, a in zip(questions, answers) if not a)
+    return (topic, round(level, 2), yes_questions[:3], no_questions[:3])
+
+
+def generate_personalized_path(topic, questions, answers, level=None):
+    """Generate learning path based on user's knowledge level and quiz responses"""
+    # Build context based on quiz answers
+    _, level, yes_questions, no_questions = path_profile(topic, questions, answers, level)
+
+    def build_prompt(count, existing):
+        context = ""
+        if existing:
+            # Retry only for the subtopics that were missing or malformed
+            context = "The path already contains these subtopics, continue after them:\n" + "\n".join(
+                f"- {item.title}" for item in existing
+            )
+
+        return f"""Generate a personalized learning path for someone learning about "{topic}".
+
+        The user's knowledge level: {level:.2f} (0.0 = beginner, 1.0 = expert)
+
+        Questions they answered YES to (their strengths):
+        {chr(10).join(f"- {q}" for q in yes_questions)}
+
+        Questions they answered NO to (their weaknesses):
+        {chr(10).join(f"- {q}" for q in no_questions)}
+
+        Based on this assessment, generate {count} subtopics that:
+        1. Start with fundamentals they need to learn first
+        2. Progress gradually to more advanced topics
+        3. Focus on areas where they indicated weakness
+        4. Build upon areas where they indicated strength
+        5. Are specific and practical for {topic}
+        For each subtopic, list the titles of the earlier subtopics it directly builds on as its prerequisites
+        (an empty list for subtopics that can be started right away).
+        {context}
+
+        Respond with JSON only, in this shape: {PathTopic.EXAMPLE}"""
+
+    # Use the shared z.ai gateway to generate personalized learning path
+    subtopics = generate_items(
+        "learning_path",
+        build_prompt,
+        PathTopic,
+        MAX_PATH_TOPICS,
+        minimum=MIN_PATH_TOPICS,
+        key=lambda item: item.title.lower(),
+        temperature=0.7,
+        use_cache=True,
+    )
+    if len(subtopics) < MIN_PATH_TOPICS:
+        # Fallback to generic generation
+        record_fallback("learning_path")
+        return generic_learning_path(topic)
+    return path_topics([item.title for item in subtopics], [item.prerequisites for item in subtopics])
+
+
+def path_topics(titles, prerequisites=None):
+    """Learning path entries ``{"title", "prerequisites"}``; unspecified prerequisites chain to the previous topic"""
+    prerequisites = prerequisites or [None] * len(titles)
+    topics = []
+    for i, (title, requires) in enumerate(zip(titles, prerequisites)):
+        if requires is None:
+            requires = titles[i - 1 : i]
+        topics.append({"title": title, "prerequisites": list(requires)})
+    return topics
+
+
+def generic_learning_path(topic):
+    """Generate a generic learning path as fallback"""
+    subtopics = [
+        f"Introduction to {topic}",
+        f"Basic Concepts of {topic}",
+        f"Core Principles of {topic}",
+        f"Intermediate Topics in {topic}",
+        f"Advanced Concepts of {topic}",
+        f"Practical Applications of {topic}",
+        f"Tools and Methods for {topic}",
+        f"Best Practices in {topic}",
+        f"Real-world Examples of {topic}",
+        f"Future Trends in {topic}",
+    ]
+    return path_topics(subtopics[:8])
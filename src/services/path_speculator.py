@@ -0,0 +1,66 @@
+import logging
+
+from src.services.generation_client import get_generation_client
+from src.services.job_queue import PRIORITY_INTERACTIVE, PRIORITY_PREFETCH, get_job_queue
+from src.services.path_generator import path_profile
+
+MAX_SPECULATIVE_PATHS = 4
+
+
+def submit_path_job(topic, questions, answers, level, priority=PRIORITY_INTERACTIVE):
+    """Queue a learning path job; speculative and final submissions for the same quiz share one job"""
+    if level is not None:
+        # The prompt only sees the level to two places, so neither does the job key
+        level = round(level, 2)
+    return get_job_queue().submit(
+        "learning_path", priority=priority, topic=topic, questions=questions, answers=answers, level=level
+    )
+
+
+class PathSpeculator:
+    """Pre-generates learning paths for the quiz outcomes that are still possible.
+
+    Each candidate is requested as a prefetch: a low-priority job in the shared
+    queue, or a prefetch on the generation API. The final request for the same
+    answers joins that generation, since the queue merges identical jobs (and
+    raises the merged job to interactive priority) and the API coalesces by path
+    profile. Branches the answers rule out are withdrawn while still queued.
+    """
+
+    def __init__(self, max_candidates=MAX_SPECULATIVE_PATHS):
+        self.max_candidates = max_candidates
+        self._jobs = {}
+
+    def speculate(self, topic, questions, candidates):
+        """Request paths for the possible final ``(answers, knowledge level)`` pairs"""
+        profiles = {path_profile(topic, questions, answers, level): (answers, level) for answers, level in candidates}
+        if len(profiles) > self.max_candidates:
+            return
+
+        # Drop branches the answers given so far have ruled out
+        self._withdraw(keep=profiles)
+
+        client = get_generation_client()
+        for profile, (answers, level) in profiles.items():
+            if profile in self._jobs:
+                continue
+            try:
+                if client is not None:
+                    client.prefetch_learning_path(topic, questions, answers, level)
+                    self._jobs[profile] = None
+                else:
+                    self._jobs[profile] = submit_path_job(topic, questions, answers, level, PRIORITY_PREFETCH)
+            except Exception as e:
+                logging.error(f"Speculative learning path request failed: {e}")
+
+    def settle(self, topic, questions, answers, level=None):
+        """Withdraw every branch but the one the quiz ended with, which the final request joins"""
+        self._withdraw(keep={path_profile(topic, questions, answers, level)})
+
+    def _withdraw(self, keep):
+        for profile in list(self._jobs):
+            if profile not in keep:
+                job_id = self._jobs.pop(profile)
+                # Generations already running, and API prefetches, finish into the caches
+                if job_id is not None:
+                    get_job_queue().withdraw(job_id)
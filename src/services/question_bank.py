@@ -0,0 +1,152 @@
+import contextvars
+import logging
+import threading
+
+from src.services.generation_client import get_generation_client
+from src.services.metrics import record_fallback
+from src.services.model_router import stage_deadline
+from src.services.structured_output import generate_items
+from src.utils.schemas import BankQuestion, SchemaError
+
+BANK_SIZE = 15
+
+# Completed banks by topic, so a topic is generated at most once per process
+_banks = {}
+_banks_lock = threading.Lock()
+
+
+def fallback_bank(topic):
+    """Hardcoded questions used when the API fails, tagged easiest to hardest"""
+    return [
+        {"question": f"Do you have any prior knowledge about {topic}?", "difficulty": 1},
+        {"question": "Have you studied related subjects before?", "difficulty": 2},
+        {"question": "Have you used online learning platforms before?", "difficulty": 2},
+        {"question": f"Are you comfortable with basic concepts in {topic}?", "difficulty": 3},
+        {"question": f"Have you applied {topic} in a hands-on project?", "difficulty": 4},
+        {"question": f"Could you explain advanced {topic} concepts to someone else?", "difficulty": 5},
+    ]
+
+
+class QuestionBank:
+    """Per-topic bank of diagnostic questions tagged by difficulty.
+
+    The bank is generated once per topic in a background thread and cached
+    both in process and in the persistent response cache. Items are validated
+    and published as soon as their JSON object has streamed in, so the adaptive
+    quiz can start with the first question while the rest are still being
+    generated.
+    """
+
+    def __init__(self, topic):
+        self.topic = topic
+        self.items = []
+        self.done = False
+        self.fell_back = False
+        self._condition = threading.Condition()
+
+        with _banks_lock:
+            cached = _banks.get(topic)
+        if cached is not None:
+            self.items = list(cached)
+            self.done = True
+            return
+
+        # Carry the session's trace context into the generation thread
+        threading.Thread(target=contextvars.copy_context().run, args=(self._run,), daemon=True).start()
+
+    def wait_for(self, count, timeout=None):
+        """Block until at least ``count`` items are available or generation has finished; False on timeout"""
+        with self._condition:
+            return self._condition.wait_for(lambda: len(self.items) >= count or self.done, timeout=timeout)
+
+    def item_timeout(self):
+        """How long to wait for the next item before giving up on generation"""
+        return stage_deadline("diagnostic_questions")
+
+    def fall_back(self):
+        """Stop waiting on generation and serve the fallback questions alongside whatever has arrived"""
+        with self._condition:
+            if not self.done:
+                self._top_up()
+                self.done = True
+                self._condition.notify_all()
+
+    def snapshot(self):
+        with self._condition:
+            return list(self.items)
+
+    def prompt(self, count, existing):
+        topic = self.topic
+        avoid = ""
+        if existing:
+            avoid = "Do not repeat any of these questions:\n" + "\n".join(f"- {item.question}" for item in existing)
+
+        return f"""Generate {count} diagnostic yes/no questions about "{topic}" for a question bank.
+
+        Tag every question with a difficulty from 1 to 5:
+        1. General awareness and interest level in {topic}
+        2. Basic familiarity with fundamental {topic} concepts
+        3. Experience with tools or methods commonly used in {topic}
+        4. Hands-on experience with practical {topic} applications
+        5. Advanced understanding of {topic} concepts or methodologies
+
+        Spread the questions evenly across the difficulties.
+        {avoid}
+
+        Respond with JSON only, in this shape: {BankQuestion.EXAMPLE}"""
+
+    def _run(self):
+        try:
+            client = get_generation_client()
+            if client is not None:
+                self._fetch(client)
+            else:
+                generate_items(
+                    "diagnostic_questions",
+                    self.prompt,
+                    BankQuestion,
+                    BANK_SIZE,
+                    minimum=BANK_SIZE * 4 // 5,
+                    key=lambda item: item.question,
+                    on_item=self._publish,
+                    temperature=0.6,
+                    use_cache=True,
+                )
+        except Exception as e:
+            logging.error(f"Failed to generate the question bank for {self.topic}: {e}")
+        finally:
+            # Waiters must always wake up, whatever happened to generation
+            with self._condition:
+                if len(self.items) < BANK_SIZE // 2:
+                    self._top_up()
+                elif not self.fell_back:
+                    with _banks_lock:
+                        _banks[self.topic] = list(self.items)
+                self.done = True
+                self._condition.notify_all()
+
+    def _top_up(self):
+        """Add the fallback questions not already in the bank; called with the condition held"""
+        if self.fell_back:
+            return
+        # Too little usable output; top up with questions we know are well formed
+        record_fallback("diagnostic_questions")
+        known = {item["question"] for item in self.items}
+        self.items.extend(item for item in fallback_bank(self.topic) if item["question"] not in known)
+        self.fell_back = True
+
+    def _fetch(self, client):
+        """Take the bank from the generation API, publishing each item as it streams in"""
+        try:
+            for data in client.questions(self.topic):
+                try:
+                    self._publish(BankQuestion.parse(data))
+                except SchemaError as e:
+                    logging.warning(f"Skipping a malformed question from the generation API: {e}")
+        except Exception as e:
+            logging.error(f"Failed to fetch the question bank for {self.topic}: {e}")
+
+    def _publish(self, item):
+        with self._condition:
+            self.items.append(item.to_dict())
+            self._condition.notify_all()
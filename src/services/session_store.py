@@ -0,0 +1,248 @@
+import atexit
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from src.utils.paths import cache_path
+
+# "sqlite" (default), a redis:// URL, or "memory" to keep sessions in process only
+SESSION_STORE = os.getenv("SENSAI_SESSION_STORE", "sqlite")
+
+DEFAULT_TTL = 24 * 3600
+FLUSH_INTERVAL = 0.5
+
+# Serialized sessions larger than this are zlib-compressed
+COMPRESS_THRESHOLD = 512
+
+# Snapshots remembered per process to skip writing unchanged sessions
+MAX_TRACKED_SESSIONS = 10000
+
+
+def encode_session(state):
+    """Compact bytes for a JSON-serializable session: one format byte, then JSON or zlib-compressed JSON"""
+    raw = json.dumps(state, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(raw) > COMPRESS_THRESHOLD:
+        return b"z" + zlib.compress(raw, 6)
+    return b"j" + raw
+
+
+def decode_session(data):
+    raw = zlib.decompress(data[1:]) if data[:1] == b"z" else data[1:]
+    return json.loads(raw)
+
+
+class SQLiteSessionBackend:
+    """Sessions in an embedded SQLite database, shared by every process on the host"""
+
+    def __init__(self, path=None):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path or cache_path("sessions.sqlite3"), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)")
+        self._conn.commit()
+
+    def load(self, session_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE id = ? AND expires_at > ?", (session_id, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_many(self, sessions, ttl):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sessions (id, data, expires_at) VALUES (?, ?, ?)",
+                [(session_id, data, now + ttl) for session_id, data in sessions.items()],
+            )
+            self._conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+            self._conn.commit()
+
+    def delete(self, session_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            self._conn.commit()
+
+
+class RedisSessionBackend:
+    """Sessions in Redis or anything speaking its protocol (RESP), via a minimal built-in client"""
+
+    def __init__(self, url, timeout=5.0, prefix="sensai:session:"):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._socket = None
+        self._reader = None
+
+    def load(self, session_id):
+        return self.execute("GET", self.prefix + session_id)
+
+    def save_many(self, sessions, ttl):
+        for session_id, data in sessions.items():
+            self.execute("SET", self.prefix + session_id, data, "EX", int(ttl))
+
+    def delete(self, session_id):
+        self.execute("DEL", self.prefix + session_id)
+
+    def execute(self, *args):
+        """Send one command and return its reply, reconnecting once if the connection dropped"""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._socket is None:
+                        self._connect()
+                    self._socket.sendall(self._pack(args))
+                    return self._read_reply()
+                except (OSError, EOFError):
+                    self._close()
+                    if attempt:
+                        raise
+
+    def _connect(self):
+        self._socket = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._socket.makefile("rb")
+        if self.password:
+            self._socket.sendall(self._pack(("AUTH", self.password)))
+            self._read_reply()
+        if self.db:
+            self._socket.sendall(self._pack(("SELECT", self.db)))
+            self._read_reply()
+
+    def _close(self):
+        if self._socket is not None:
+            self._socket.close()
+        self._socket = self._reader = None
+
+    @staticmethod
+    def _pack(args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            value = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(value), value))
+        return b"".join(parts)
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise EOFError("Connection closed by the session store")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RuntimeError(f"Session store error: {payload.decode()}")
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise RuntimeError(f"Unexpected reply from the session store: {line!r}")
+
+
+class SessionStore:
+    """Write-behind store of serialized sessions on top of a pluggable backend.
+
+    save() only records the latest snapshot of a session; a background thread
+    writes changed snapshots to the backend in batches every ``flush_interval``
+    seconds, so the script thread never waits on storage. Loads see snapshots
+    that have not been flushed yet.
+    """
+
+    def __init__(self, backend, ttl=DEFAULT_TTL, flush_interval=FLUSH_INTERVAL):
+        self.backend = backend
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self._condition = threading.Condition()
+        self._pending = {}
+        self._flushed = OrderedDict()
+        threading.Thread(target=self._flush_loop, daemon=True).start()
+
+    def load(self, session_id):
+        """Return the stored session as a dict, or None"""
+        with self._condition:
+            data = self._pending.get(session_id)
+        if data is None:
+            try:
+                data = self.backend.load(session_id)
+            except Exception as e:
+                logging.error(f"Failed to load session {session_id}: {e}")
+                return None
+        return decode_session(data) if data else None
+
+    def save(self, session_id, state):
+        data = encode_session(state)
+        with self._condition:
+            if self._flushed.get(session_id) == data and session_id not in self._pending:
+                return
+            self._pending[session_id] = data
+            self._condition.notify()
+
+    def flush(self):
+        """Write every pending snapshot now"""
+        with self._condition:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            self.backend.save_many(pending, self.ttl)
+        except Exception as e:
+            logging.error(f"Failed to flush {len(pending)} session(s): {e}")
+            with self._condition:
+                # Keep the snapshots for the next flush unless newer ones arrived meanwhile
+                for session_id, data in pending.items():
+                    self._pending.setdefault(session_id, data)
+            return
+
+        with self._condition:
+            for session_id, data in pending.items():
+                self._flushed[session_id] = data
+                self._flushed.move_to_end(session_id)
+            while len(self._flushed) > MAX_TRACKED_SESSIONS:
+                self._flushed.popitem(last=False)
+
+    def _flush_loop(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending)
+            # Let further changes to the same sessions accumulate into one write
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store():
+    """Return the shared session store configured by SENSAI_SESSION_STORE, or None for in-memory sessions"""
+    global _store
+    if _store is None and SESSION_STORE != "memory":
+        with _store_lock:
+            if _store is None:
+                if SESSION_STORE.startswith("redis://"):
+                    backend = RedisSessionBackend(SESSION_STORE)
+                else:
+                    backend = SQLiteSessionBackend()
+                _store = SessionStore(backend)
+                atexit.register(_store.flush)
+    return _store
@@ -0,0 +1,109 @@
+import threading
+from concurrent.futures import Future
+
+
+class _Broadcast:
+    """Chunks of one upstream stream, replayed to every subscriber from the start"""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.condition = threading.Condition()
+
+    def publish(self, chunk):
+        with self.condition:
+            self.chunks.append(chunk)
+            self.condition.notify_all()
+
+    def finish(self, error=None):
+        with self.condition:
+            self.done = True
+            self.error = error
+            self.condition.notify_all()
+
+    def subscribe(self, timeout=None):
+        index = 0
+        while True:
+            with self.condition:
+                ready = self.condition.wait_for(lambda: len(self.chunks) > index or self.done, timeout=timeout)
+                if not ready:
+                    raise TimeoutError(f"No streamed output for {timeout}s")
+                chunks = self.chunks[index:]
+                done, error = self.done, self.error
+            index += len(chunks)
+            yield from chunks
+            if done and index >= len(self.chunks):
+                if error is not None:
+                    raise error
+                return
+
+
+class SingleFlight:
+    """Process-wide coalescing of identical in-flight calls.
+
+    The first caller for a key runs the call; callers arriving while it is in
+    flight share its result (or exception) instead of repeating the work. Once
+    the call finishes the key is released, so later callers start afresh.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._streams = {}
+        self.shared = 0
+
+    def do(self, key, function, timeout=None):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result(timeout=timeout)
+
+        try:
+            result = function()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stream(self, key, produce, timeout=None):
+        """Iterate the chunks of ``produce()``, sharing one run among concurrent callers.
+
+        The upstream stream is drained by a background thread, so it completes
+        (and reaches the response cache) even if every subscriber stops early.
+        """
+        with self._lock:
+            broadcast = self._streams.get(key)
+            if broadcast is None:
+                broadcast = self._streams[key] = _Broadcast()
+                threading.Thread(target=self._drain, args=(key, broadcast, produce), daemon=True).start()
+            else:
+                self.shared += 1
+        return broadcast.subscribe(timeout)
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls) + len(self._streams)
+
+    def _drain(self, key, broadcast, produce):
+        error = None
+        try:
+            for chunk in produce():
+                broadcast.publish(chunk)
+        except BaseException as e:
+            error = e
+        finally:
+            with self._lock:
+                self._streams.pop(key, None)
+            broadcast.finish(error)
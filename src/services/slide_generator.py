@@ -0,0 +1,105 @@
+import logging
+
+from src.services.metrics import record_fallback
+from src.services.structured_output import generate_object
+from src.utils.schemas import Slide
+
+
+def generate_slide_content(topic, subtopic):
+    """Generate markdown slide content for one learning path subtopic"""
+    prompt = f"""Write the content of a single learning slide about "{subtopic}" for someone learning "{topic}".
+
+    Include a one or two sentence overview, two or three sections such as
+    "Key Concepts" and "Applications" with 2-5 short bullets each (use **bold**
+    for key terms), and a single summarizing sentence.
+
+    Respond with JSON only, in this shape: {Slide.EXAMPLE}"""
+
+    try:
+        slide = generate_object("slides", prompt, Slide, temperature=0.7)
+        return slide.to_markdown()
+    except Exception as e:
+        logging.error(f"Failed to generate slide content for {subtopic}: {e}")
+
+    record_fallback("slides")
+    return fallback_slide_content(topic, subtopic)
+
+
+def fallback_slide_content(topic, subtopic):
+    """Static slide content used when generation fails"""
+    # Mock slide content based on current slide and topic
+    content_by_slide = {
+        "Introduction to Machine Learning": """
+# Introduction to Machine Learning
+
+## What is Machine Learning?
+
+Machine Learning is a subset of Artificial Intelligence that enables systems to learn and improve from experience without being explicitly programmed.
+
+### Key Concepts:
+- **Learning from data**: Algorithms identify patterns in data
+- **Prediction**: Making informed predictions based on learned patterns
+- **Adaptation**: Models improve over time with more data
+
+### Why Learn Machine Learning?
+- High demand in job market
+- Powers many modern applications
+- Foundation for AI and data science
+- Enables data-driven decision making
+
+Machine Learning transforms raw data into actionable insights, revolutionizing how we approach complex problems.
+        """,
+        "Supervised Learning Basics": """
+# Supervised Learning Basics
+
+## What is Supervised Learning?
+
+Supervised Learning is a type of machine learning where algorithms learn from labeled training data.
+
+### Key Components:
+- **Input features**: Variables used for prediction
+- **Target labels**: Desired outputs
+- **Training data**: Labeled examples
+- **Model**: Algorithm that learns the relationship
+
+### Common Algorithms:
+- **Linear Regression**: Predicts continuous values
+- **Logistic Regression**: Predicts binary outcomes
+- **Decision Trees**: Makes decisions based on feature values
+- **Support Vector Machines**: Finds optimal decision boundaries
+
+### Applications:
+- Email spam detection
+- Image classification
+- Sales forecasting
+- Medical diagnosis
+
+Supervised learning turns data into powerful predictive models.
+        """
+    }
+
+    # Default content
+    default_content = f"""
+# {subtopic}
+
+## Overview
+
+This section covers the fundamentals of {subtopic} in the context of {topic}.
+
+### Key Topics:
+- **Conceptual Understanding**: Learn the core principles
+- **Practical Applications**: See how concepts apply to real-world scenarios
+- **Hands-on Practice**: Work through examples and exercises
+- **Best Practices**: Industry standards and proven methodologies
+
+### Learning Objectives:
+By the end of this section, you will:
+- Understand the basic concepts and terminology
+- Identify practical applications in your field
+- Apply the principles to solve simple problems
+- Recognize opportunities for further learning
+
+This content will be synchronized with the voice recording to enhance your learning experience.
+    """
+
+    return content_by_slide.get(subtopic, default_content)
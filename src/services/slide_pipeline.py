@@ -0,0 +1,122 @@
+import contextvars
+import heapq
+import itertools
+import logging
+import threading
+
+from src.services.generation_client import get_generation_client
+from src.services.job_queue import PRIORITY_INTERACTIVE, PRIORITY_PREFETCH, get_job_queue
+from src.services.metrics import record_fallback
+from src.services.model_router import stage_deadline
+from src.services.slide_generator import fallback_slide_content
+
+MAX_CONCURRENT_SLIDES = 3
+
+# Lower values are generated first
+PRIORITY_REQUESTED = 0
+PRIORITY_BACKGROUND = 1
+
+
+class SlidePipeline:
+    """Generates the slide decks for every subtopic of a learning path concurrently.
+
+    At most ``max_concurrency`` slides are generated at once. Results are kept
+    as soon as each slide completes, and a subtopic the user asks for jumps
+    ahead of the ones still queued, both here and in the shared job queue.
+    """
+
+    def __init__(self, topic, subtopics, max_concurrency=MAX_CONCURRENT_SLIDES):
+        self.topic = topic
+        self.subtopics = list(subtopics)
+        self.results = {}
+
+        self._condition = threading.Condition()
+        self._queue = []
+        self._order = itertools.count()
+        self._started = set()
+        self._requested = set()
+        self._cancelled = False
+
+        for subtopic in self.subtopics:
+            self._push(PRIORITY_BACKGROUND, subtopic)
+
+        for _ in range(min(max_concurrency, len(self.subtopics))):
+            # Workers inherit the session's trace context
+            threading.Thread(target=contextvars.copy_context().run, args=(self._work,), daemon=True).start()
+
+    def prioritize(self, subtopic):
+        """Generate ``subtopic`` next if it has not been picked up yet, or move its queued job up"""
+        with self._condition:
+            if subtopic in self._requested or subtopic in self.results:
+                return
+            self._requested.add(subtopic)
+            started = subtopic in self._started
+            if not started:
+                self._push(PRIORITY_REQUESTED, subtopic)
+                self._condition.notify()
+        if started and get_generation_client() is None:
+            # Already submitted as a prefetch job; resubmitting moves it ahead of other prefetches
+            get_job_queue().submit("slide", priority=PRIORITY_INTERACTIVE, topic=self.topic, subtopic=subtopic)
+
+    def get(self, subtopic, timeout=None):
+        """Wait for the slide content of ``subtopic``, by default for at most the slide stage's deadline"""
+        self.prioritize(subtopic)
+        if timeout is None:
+            timeout = stage_deadline("slides")
+        with self._condition:
+            self._condition.wait_for(lambda: subtopic in self.results or self._cancelled, timeout=timeout)
+            content = self.results.get(subtopic)
+        if content is None:
+            # Generation carries on, so a later visit to this slide can still get the real one
+            record_fallback("slides")
+            return fallback_slide_content(self.topic, subtopic)
+        return content
+
+    def cancel(self):
+        """Stop generating slides that have not started yet"""
+        with self._condition:
+            self._cancelled = True
+            self._queue.clear()
+            self._condition.notify_all()
+
+    def _push(self, priority, subtopic):
+        heapq.heappush(self._queue, (priority, next(self._order), subtopic))
+
+    def _next_subtopic(self):
+        with self._condition:
+            while self._queue and not self._cancelled:
+                _, _, subtopic = heapq.heappop(self._queue)
+                # A prioritized subtopic stays queued at its old priority too
+                if subtopic not in self._started:
+                    self._started.add(subtopic)
+                    priority = PRIORITY_INTERACTIVE if subtopic in self._requested else PRIORITY_PREFETCH
+                    return subtopic, priority
+            return None
+
+    def _work(self):
+        while (job := self._next_subtopic()) is not None:
+            subtopic, priority = job
+            try:
+                content = remote_or_queued_slide(self.topic, subtopic, priority, timeout=stage_deadline("slides"))
+            except Exception as e:
+                logging.error(f"Slide generation failed for {subtopic}: {e}")
+                record_fallback("slides")
+                content = fallback_slide_content(self.topic, subtopic)
+
+            with self._condition:
+                self.results[subtopic] = content
+                self._condition.notify_all()
+
+
+def remote_or_queued_slide(topic, subtopic, priority=PRIORITY_INTERACTIVE, timeout=None):
+    """Slide content from the generation API if configured, else from a local worker process.
+
+    The calling thread only waits, and identical slides requested by other sessions are shared.
+    Raises TimeoutError, or httpx.TimeoutException, if the slide is not ready within ``timeout``;
+    a queued job is left to finish so its result is reused by the next identical request.
+    """
+    client = get_generation_client()
+    if client is not None:
+        return client.slide(topic, subtopic, timeout=timeout)
+    queue = get_job_queue()
+    return queue.wait(queue.submit("slide", priority=priority, topic=topic, subtopic=subtopic), timeout=timeout)
@@ -0,0 +1,120 @@
+import logging
+import time
+
+from src.services.metrics import increment, observe
+from src.services.model_router import get_router
+from src.utils.parsing import JsonArrayItemParser, parse_json_object
+from src.utils.schemas import SchemaError
+
+
+def stream_items(stage, prompt, model, on_item=None, **kwargs):
+    """Stream a ``{"items": [...]}`` completion for ``stage``, validating each element as soon as it is complete.
+
+    Returns the valid items and the number of malformed ones. Only complete
+    responses whose every item is valid are written to the response cache.
+    """
+    parser = JsonArrayItemParser()
+    items = []
+    malformed = 0
+    parse_seconds = 0.0
+
+    def cache_if(content):
+        return is_valid_items(content, model)
+
+    for chunk in get_router().stream(stage, prompt, json_mode=True, cache_if=cache_if, **kwargs):
+        start = time.monotonic()
+        parsed = parser.feed(chunk)
+        parse_seconds += time.monotonic() - start
+        for data in parsed:
+            start = time.monotonic()
+            try:
+                item = model.parse(data)
+            except SchemaError as e:
+                malformed += 1
+                increment("sensai_parse_malformed_total", stage=stage, kind=model.__name__)
+                logging.warning(f"Discarding malformed {model.__name__}: {e}")
+                continue
+            finally:
+                parse_seconds += time.monotonic() - start
+            items.append(item)
+            if on_item is not None:
+                on_item(item)
+    observe("sensai_parse_seconds", parse_seconds, stage=stage, kind=model.__name__)
+    return items, malformed
+
+
+def is_valid_items(content, model):
+    """Whether ``content`` is a complete ``{"items": [...]}`` response with at least one item, all valid"""
+    parser = JsonArrayItemParser()
+    items = parser.feed(content)
+    if not parser.complete or not items:
+        return False
+    try:
+        for data in items:
+            model.parse(data)
+    except SchemaError:
+        return False
+    return True
+
+
+def generate_items(stage, build_prompt, model, count, minimum=None, retries=1, key=None, on_item=None, **kwargs):
+    """Generate up to ``count`` validated items.
+
+    ``build_prompt(missing, existing)`` returns the prompt for ``missing`` more
+    items. When fewer than ``minimum`` valid items arrive, only the missing
+    ones are requested again instead of repeating the whole completion.
+    """
+    minimum = count if minimum is None else minimum
+    items = []
+    seen = set()
+
+    def accept(item):
+        identity = key(item) if key else item
+        if identity in seen or len(items) >= count:
+            return
+        seen.add(identity)
+        items.append(item)
+        if on_item is not None:
+            on_item(item)
+
+    for attempt in range(retries + 1):
+        missing = count - len(items)
+        if attempt:
+            # A retry must reach the model, not replay whatever the cache holds for this prompt
+            kwargs["use_cache"] = False
+        try:
+            _, malformed = stream_items(stage, build_prompt(missing, list(items)), model, on_item=accept, **kwargs)
+        except Exception as e:
+            logging.error(f"Failed to generate {model.__name__} items: {e}")
+            break
+        if len(items) >= minimum:
+            break
+        logging.warning(f"Got {len(items)}/{count} {model.__name__} items ({malformed} malformed), retrying the rest")
+    return items
+
+
+def generate_object(stage, prompt, model, retries=1, **kwargs):
+    """Generate a single JSON object validated against ``model``, retrying malformed responses"""
+
+    def parse(content):
+        return model.parse(parse_json_object(content))
+
+    def is_valid(content):
+        try:
+            parse(content)
+            return True
+        except ValueError:
+            return False
+
+    for attempt in range(retries + 1):
+        # Only validated responses are cached, so a retry never replays a malformed one
+        content = get_router().complete(stage, prompt, json_mode=True, use_cache=True, cache_if=is_valid, **kwargs)
+        start = time.monotonic()
+        try:
+            return parse(content)
+        except ValueError as e:
+            increment("sensai_parse_malformed_total", stage=stage, kind=model.__name__)
+            logging.warning(f"Malformed {model.__name__} response (attempt {attempt + 1}): {e}")
+        finally:
+            observe("sensai_parse_seconds", time.monotonic() - start, stage=stage, kind=model.__name__)
+    raise SchemaError(f"No valid {model.__name__} after {retries + 1} attempts")
@@ -0,0 +1,230 @@
+import re
+import sqlite3
+import threading
+import zlib
+from collections import Counter
+
+import numpy as np
+
+from src.utils.paths import cache_path
+
+# Cosine similarity above which a known topic is considered as a suggestion for a new one
+SIMILARITY_THRESHOLD = 0.9
+
+# Words shorter than this, or containing digits, must match exactly ("ii" vs "i", "2" vs "3")
+MIN_FUZZY_WORD_LENGTH = 5
+# Leading characters that must agree, since prefixes change meaning ("inorganic", "micro"/"macro")
+FUZZY_WORD_PREFIX = 3
+
+NGRAM_SIZE = 3
+VECTOR_DIM = 4096
+
+# Leading phrases that do not change what the topic is about
+FILLER_PREFIXES = re.compile(
+    r"^(?:i want to learn|learn(?:ing)?|(?:an? )?intro(?:duction)? to|basics of|fundamentals of|the)\s+"
+)
+FILLER_SUFFIXES = re.compile(r"\s+(?:basics|fundamentals|for beginners|101)$")
+
+# Normalized spelling -> canonical topic
+TOPIC_ALIASES = {
+    "ml": "Machine Learning",
+    "machine learning": "Machine Learning",
+    "ai": "Artificial Intelligence",
+    "artificial intelligence": "Artificial Intelligence",
+    "dl": "Deep Learning",
+    "deep learning": "Deep Learning",
+    "nlp": "Natural Language Processing",
+    "natural language processing": "Natural Language Processing",
+    "cv": "Computer Vision",
+    "computer vision": "Computer Vision",
+    "rl": "Reinforcement Learning",
+    "reinforcement learning": "Reinforcement Learning",
+    "llm": "Large Language Models",
+    "llms": "Large Language Models",
+    "large language models": "Large Language Models",
+    "js": "JavaScript",
+    "javascript": "JavaScript",
+    "ts": "TypeScript",
+    "typescript": "TypeScript",
+    "py": "Python Programming",
+    "python": "Python Programming",
+    "python programming": "Python Programming",
+    "sql": "SQL",
+    "db": "Databases",
+    "databases": "Databases",
+    "ds": "Data Science",
+    "data science": "Data Science",
+    "linalg": "Linear Algebra",
+    "linear algebra": "Linear Algebra",
+    "stats": "Statistics",
+    "statistics": "Statistics",
+    "quantum physics": "Quantum Physics",
+}
+
+
+def normalize_topic(text):
+    """Case- and whitespace-folded topic with punctuation and filler words removed"""
+    text = re.sub(r"[^\w+#]+", " ", text.casefold()).strip()
+    text = FILLER_SUFFIXES.sub("", FILLER_PREFIXES.sub("", text))
+    return " ".join(text.split())
+
+
+def display_topic(text):
+    """The topic as typed, with whitespace collapsed"""
+    return " ".join(text.split())
+
+
+def edit_distance(a, b):
+    """Optimal string alignment distance: insertions, deletions, substitutions and adjacent transpositions"""
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+    return current[len(b)]
+
+
+def same_word(a, b):
+    """Whether two normalized words are the same word, allowing one typo in longer words"""
+    if a == b:
+        return True
+    if min(len(a), len(b)) < MIN_FUZZY_WORD_LENGTH or any(c.isdigit() for c in a + b):
+        return False
+    return a[:FUZZY_WORD_PREFIX] == b[:FUZZY_WORD_PREFIX] and edit_distance(a, b) <= 1
+
+
+def same_words(a, b):
+    """Whether two normalized topics consist of the same words, up to typos within single words"""
+    exact = Counter(a.split()) & Counter(b.split())
+    words = list((Counter(a.split()) - exact).elements())
+    others = list((Counter(b.split()) - exact).elements())
+    if len(words) != len(others):
+        return False
+    for word in words:
+        match = next((other for other in others if same_word(word, other)), None)
+        if match is None:
+            return False
+        others.remove(match)
+    return True
+
+
+def ngram_vector(normalized):
+    """L2-normalized hashed character n-gram counts"""
+    vector = np.zeros(VECTOR_DIM, dtype=np.float32)
+    padded = f" {normalized} "
+    for i in range(max(1, len(padded) - NGRAM_SIZE + 1)):
+        # crc32 rather than hash() so vectors are stable across processes
+        vector[zlib.crc32(padded[i : i + NGRAM_SIZE].encode()) % VECTOR_DIM] += 1
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class TopicIndex:
+    """Maps free-text topics onto canonical topics so equivalent inputs share generated content.
+
+    canonicalize() only applies exact equivalences: the alias table and
+    spellings that normalize identically (case, punctuation, filler words).
+    Anything else becomes a new canonical topic. Near matches are never
+    applied silently; suggest() finds a known topic whose character n-gram
+    vector is very close and whose words agree up to a typo within a word,
+    for the user to accept or ignore. Known topics persist in the cache
+    directory, so every session and the prewarm job agree on them.
+    """
+
+    def __init__(self, path=None, threshold=SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path or cache_path("topics.sqlite3"), check_same_thread=False, timeout=30)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS topics (variant TEXT PRIMARY KEY, canonical TEXT NOT NULL)")
+        self._conn.commit()
+
+        self._variants = {}
+        self._canonical = []
+        self._indexed = set()
+        self._vectors = np.zeros((64, VECTOR_DIM), dtype=np.float32)
+
+        for variant, canonical in TOPIC_ALIASES.items():
+            self._remember(variant, canonical)
+        for variant, canonical in self._conn.execute("SELECT variant, canonical FROM topics").fetchall():
+            self._remember(variant, canonical)
+
+    def canonicalize(self, text):
+        """Return the canonical topic for ``text``, registering it as a new topic if it has none"""
+        normalized = normalize_topic(text)
+        if not normalized:
+            return display_topic(text)
+
+        with self._lock:
+            canonical = self._variants.get(normalized)
+            if canonical is None:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO topics (variant, canonical) VALUES (?, ?)", (normalized, display_topic(text))
+                )
+                self._conn.commit()
+                # Another process may have registered the variant first; its spelling wins everywhere
+                (canonical,) = self._conn.execute(
+                    "SELECT canonical FROM topics WHERE variant = ?", (normalized,)
+                ).fetchone()
+                self._remember(normalized, canonical)
+            return canonical
+
+    def suggest(self, text):
+        """A known topic ``text`` is probably a variant of, or None if it is known or has no close match"""
+        normalized = normalize_topic(text)
+        if not normalized:
+            return None
+        vector = ngram_vector(normalized)
+        with self._lock:
+            if normalized in self._variants or not self._canonical:
+                return None
+            scores = self._vectors[: len(self._canonical)] @ vector
+            for i in np.argsort(scores)[::-1]:
+                if scores[i] < self.threshold:
+                    break
+                if same_words(normalized, normalize_topic(self._canonical[i])):
+                    return self._canonical[i]
+        return None
+
+    def similar(self, text, limit=5):
+        """Known canonical topics most similar to ``text`` as ``(topic, score)`` pairs"""
+        vector = ngram_vector(normalize_topic(text))
+        with self._lock:
+            scores = self._vectors[: len(self._canonical)] @ vector
+            best = np.argsort(scores)[::-1][:limit]
+            return [(self._canonical[i], float(scores[i])) for i in best]
+
+    def _remember(self, variant, canonical):
+        self._variants[variant] = canonical
+        # Only the canonical spelling itself is indexed; variants resolve through the dict above
+        if variant != normalize_topic(canonical) or canonical in self._indexed:
+            return
+        if len(self._canonical) == len(self._vectors):
+            self._vectors = np.concatenate([self._vectors, np.zeros_like(self._vectors)])
+        self._vectors[len(self._canonical)] = ngram_vector(variant)
+        self._canonical.append(canonical)
+        self._indexed.add(canonical)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_topic_index():
+    """Return the shared topic index, creating it on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = TopicIndex()
+    return _index
+
+
+def canonical_topic(text):
+    return get_topic_index().canonicalize(text)
+
+
+def suggest_topic(text):
+    return get_topic_index().suggest(text)
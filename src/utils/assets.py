@@ -0,0 +1,32 @@
+import functools
+import hashlib
+import os
+
+import streamlit as st
+
+CSS_DIR = os.path.join("static", "css")
+
+
+@functools.lru_cache(maxsize=None)
+def _asset_version(path):
+    """Short content hash used to bust the browser cache when an asset changes"""
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+
+def stylesheet_link(name):
+    path = os.path.join(CSS_DIR, name)
+    return f'<link rel="stylesheet" href="app/static/css/{name}?v={_asset_version(path)}">'
+
+
+def inject_stylesheet(name):
+    """Reference a static stylesheet instead of inlining it.
+
+    Streamlit drops elements that a rerun does not emit again, so the tag is
+    sent every run, but it is a single short line; the stylesheet itself is
+    fetched once and served from the browser cache afterwards. Needs the
+    Starlette static route of Streamlit 1.65+, which sends the real content
+    type; older servers send CSS as text/plain with nosniff and browsers
+    refuse it.
+    """
+    st.markdown(stylesheet_link(name), unsafe_allow_html=True)
@@ -0,0 +1,106 @@
+import json
+
+# Characters that can follow an opening bracket in the JSON we ask for, which tells JSON apart from prose like "[1]"
+JSON_FOLLOWERS = {"{": '"}', "[": "{]"}
+
+
+def clean_question(text):
+    """Normalize a generated question, returning None if it does not look like one"""
+    question = text.strip().strip(" \"'")
+    if question and not question.endswith("?"):
+        question += "?"
+    if len(question.strip()) > 5 and "?" in question:  # Basic validation
+        return question.strip()
+    return None
+
+
+class JsonArrayItemParser:
+    """Incrementally extract the objects of the array in a streamed ``{"items": [...]}`` response.
+
+    Each call to feed() returns the array elements completed by the new chunk,
+    so callers can validate and use the first item before the rest arrive.
+    Elements that are not valid JSON are returned as None so the caller can
+    count them as malformed. Prose before the JSON is skipped, including any
+    brackets and quotes in it.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._array_depth = None
+        self._item_start = None
+        self.complete = False
+
+    def feed(self, chunk):
+        self._text += chunk
+        items = []
+        while self._position < len(self._text) and not self.complete:
+            char = self._text[self._position]
+            if self._depth == 0:
+                if char not in JSON_FOLLOWERS:
+                    self._position += 1
+                    continue
+                follower = self._next_significant(self._position + 1)
+                if follower is None:
+                    # Wait for the next chunk to tell whether this bracket starts the JSON
+                    break
+                if follower not in JSON_FOLLOWERS[char]:
+                    self._position += 1
+                    continue
+            self._scan(char, items)
+            self._position += 1
+        return items
+
+    def _next_significant(self, position):
+        while position < len(self._text):
+            if not self._text[position].isspace():
+                return self._text[position]
+            position += 1
+        return None
+
+    def _scan(self, char, items):
+        if self._in_string:
+            if self._escaped:
+                self._escaped = False
+            elif char == "\\":
+                self._escaped = True
+            elif char == '"':
+                self._in_string = False
+            return
+
+        if char == '"':
+            self._in_string = True
+        elif char in "{[":
+            if self._array_depth is None and char == "[":
+                # The first array opened is the item list
+                self._array_depth = self._depth + 1
+            elif self._depth == self._array_depth and char == "{":
+                self._item_start = self._position
+            self._depth += 1
+        elif char in "}]":
+            self._depth -= 1
+            if self._depth == self._array_depth and char == "}" and self._item_start is not None:
+                items.append(self._load(self._text[self._item_start : self._position + 1]))
+                self._item_start = None
+            elif self._array_depth is not None and self._depth < self._array_depth:
+                # The item list is closed; anything after it is ignored
+                self.complete = True
+
+    @staticmethod
+    def _load(text):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            return None
+
+
+def parse_json_object(text):
+    """Parse the first JSON object in ``text``, tolerating code fences or prose around it"""
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("No JSON object in response")
+    return json.loads(text[start : end + 1])
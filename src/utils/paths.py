@@ -0,0 +1,10 @@
+import os
+
+CACHE_DIR = os.getenv("SENSAI_CACHE_DIR", ".cache")
+
+
+def cache_path(*parts):
+    """Return a path inside the app's persistent cache directory, creating parent folders"""
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
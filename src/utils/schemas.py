@@ -0,0 +1,104 @@
+from dataclasses import dataclass, field
+
+from src.utils.parsing import clean_question
+
+
+class SchemaError(ValueError):
+    """Raised when an LLM response does not match the expected schema"""
+
+
+def _string(data, key):
+    value = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(value, str) or not value.strip():
+        raise SchemaError(f"{key!r} must be a non-empty string")
+    return value.strip()
+
+
+def _string_list(data, key):
+    value = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(value, list) or not all(isinstance(v, str) and v.strip() for v in value):
+        raise SchemaError(f"{key!r} must be a list of non-empty strings")
+    return [v.strip() for v in value]
+
+
+@dataclass
+class BankQuestion:
+    question: str
+    difficulty: int
+
+    EXAMPLE = '{"items": [{"question": "Have you ...?", "difficulty": 1}]}'
+
+    @classmethod
+    def parse(cls, data):
+        question = clean_question(_string(data, "question"))
+        if question is None:
+            raise SchemaError("'question' is not a yes/no question")
+        try:
+            difficulty = int(data.get("difficulty"))
+        except (TypeError, ValueError):
+            raise SchemaError("'difficulty' must be an integer") from None
+        if not 1 <= difficulty <= 5:
+            raise SchemaError("'difficulty' must be between 1 and 5")
+        return cls(question, difficulty)
+
+    def to_dict(self):
+        return {"question": self.question, "difficulty": self.difficulty}
+
+
+@dataclass
+class PathTopic:
+    title: str
+    prerequisites: list = None
+
+    EXAMPLE = '{"items": [{"title": "...", "prerequisites": ["<title of an earlier subtopic>"]}]}'
+
+    @classmethod
+    def parse(cls, data):
+        # Missing prerequisites means "unspecified", which callers treat as following the previous topic
+        title = _string(data, "title")
+        prerequisites = _string_list(data, "prerequisites") if data.get("prerequisites") is not None else None
+        return cls(title, prerequisites)
+
+
+@dataclass
+class SlideSection:
+    heading: str
+    bullets: list = field(default_factory=list)
+
+    @classmethod
+    def parse(cls, data):
+        return cls(_string(data, "heading"), _string_list(data, "bullets"))
+
+
+@dataclass
+class Slide:
+    title: str
+    overview: str
+    sections: list
+    summary: str
+
+    EXAMPLE = (
+        '{"title": "...", "overview": "...", '
+        '"sections": [{"heading": "Key Concepts", "bullets": ["**Term**: explanation"]}], "summary": "..."}'
+    )
+
+    @classmethod
+    def parse(cls, data):
+        sections = data.get("sections") if isinstance(data, dict) else None
+        if not isinstance(sections, list) or not sections:
+            raise SchemaError("'sections' must be a non-empty list")
+        return cls(
+            _string(data, "title"),
+            _string(data, "overview"),
+            [SlideSection.parse(section) for section in sections],
+            _string(data, "summary"),
+        )
+
+    def to_markdown(self):
+        lines = [f"# {self.title}", "", "## Overview", "", self.overview, ""]
+        for section in self.sections:
+            lines.append(f"### {section.heading}")
+            lines.extend(f"- {bullet}" for bullet in section.bullets)
+            lines.append("")
+        lines.append(self.summary)
+        return "\n".join(lines)
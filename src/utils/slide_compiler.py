@@ -0,0 +1,84 @@
+import hashlib
+import html
+import re
+import threading
+from collections import OrderedDict
+
+from src.services.metrics import timed
+
+MAX_CACHED_SLIDES = 256
+
+BOLD = re.compile(r"\*\*(.+?)\*\*")
+ITALIC = re.compile(r"(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)")
+CODE = re.compile(r"`([^`]+)`")
+ORDERED_ITEM = re.compile(r"^\d+[.)]\s+")
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _inline(text):
+    """Escape text and apply inline bold, italic and code markup"""
+    text = html.escape(text, quote=False)
+    text = CODE.sub(r"<code>\1</code>", text)
+    text = BOLD.sub(r"<strong>\1</strong>", text)
+    return ITALIC.sub(r"<em>\1</em>", text)
+
+
+def _compile(markdown):
+    parts = []
+    open_list = None
+
+    for line in markdown.split("\n"):
+        stripped = line.strip()
+
+        # Bullets stay inside one list element until the list ends
+        if stripped.startswith(("- ", "* ")) or ORDERED_ITEM.match(stripped):
+            list_tag = "ul" if stripped[0] in "-*" else "ol"
+            if open_list != list_tag:
+                if open_list:
+                    parts.append(f"</{open_list}>")
+                parts.append(f'<{list_tag} class="slide-list">')
+                open_list = list_tag
+            item = stripped[2:] if list_tag == "ul" else ORDERED_ITEM.sub("", stripped)
+            parts.append(f"<li>{_inline(item.strip())}</li>")
+            continue
+
+        if open_list and stripped:
+            parts.append(f"</{open_list}>")
+            open_list = None
+        if not stripped:
+            # Spacing between blocks comes from the stylesheet
+            continue
+
+        if stripped.startswith("### "):
+            parts.append(f'<h3 class="slide-h3">{_inline(stripped[4:])}</h3>')
+        elif stripped.startswith("## "):
+            parts.append(f'<h2 class="slide-h2">{_inline(stripped[3:])}</h2>')
+        elif stripped.startswith("# "):
+            parts.append(f'<h1 class="slide-h1">{_inline(stripped[2:])}</h1>')
+        else:
+            parts.append(f'<p class="slide-text">{_inline(stripped)}</p>')
+
+    if open_list:
+        parts.append(f"</{open_list}>")
+
+    # No blank lines or indentation, so st.markdown treats the fragment as one raw HTML block
+    return "".join(parts)
+
+
+def compile_slide(markdown):
+    """Compile slide markdown into a single HTML fragment, cached by content hash"""
+    digest = hashlib.sha1(markdown.encode("utf-8")).hexdigest()
+    with _cache_lock:
+        if digest in _cache:
+            _cache.move_to_end(digest)
+            return _cache[digest]
+
+    with timed("render", step="compile_slide"):
+        fragment = _compile(markdown)
+    with _cache_lock:
+        _cache[digest] = fragment
+        if len(_cache) > MAX_CACHED_SLIDES:
+            _cache.popitem(last=False)
+    return fragment
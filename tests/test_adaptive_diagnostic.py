@@ -0,0 +1,48 @@
+from src.services.adaptive_diagnostic import MAX_QUESTIONS, MIN_QUESTIONS, AdaptiveDiagnostic
+
+BANK = [
+    {"question": f"Question {difficulty}{i}?", "difficulty": difficulty} for difficulty in range(1, 6) for i in range(3)
+]
+
+
+def test_first_question_is_of_medium_difficulty():
+    assert AdaptiveDiagnostic().next_item(BANK)["difficulty"] == 3
+
+
+def test_questions_follow_the_ability_estimate():
+    confident = AdaptiveDiagnostic()
+    struggling = AdaptiveDiagnostic()
+    for _ in range(2):
+        confident.record(confident.next_item(BANK), True)
+        struggling.record(struggling.next_item(BANK), False)
+
+    assert confident.next_item(BANK)["difficulty"] > 3
+    assert struggling.next_item(BANK)["difficulty"] < 3
+
+
+def test_asked_questions_are_not_repeated():
+    diagnostic = AdaptiveDiagnostic()
+    for item in BANK[:-1]:
+        diagnostic.record(item, True)
+    assert diagnostic.next_item(BANK) == BANK[-1]
+
+    diagnostic.record(BANK[-1], True)
+    assert diagnostic.next_item(BANK) is None
+
+
+def test_quiz_stops_between_the_minimum_and_maximum_length():
+    diagnostic = AdaptiveDiagnostic()
+    while not diagnostic.is_complete():
+        # Alternating answers keep the level band unclear for as long as possible
+        diagnostic.record(diagnostic.next_item(BANK), len(diagnostic.answers) % 2 == 0)
+    assert MIN_QUESTIONS <= len(diagnostic.answers) <= MAX_QUESTIONS
+
+
+def test_predicted_outcome_matches_the_recorded_answer():
+    diagnostic = AdaptiveDiagnostic()
+    for answer in (True, True, False):
+        item = diagnostic.next_item(BANK)
+        stop, level = diagnostic.outcome_after(item, answer)
+        diagnostic.record(item, answer)
+        # Speculative learning paths are keyed by the predicted level
+        assert (stop, level) == (diagnostic.is_complete(), diagnostic.knowledge_level)
@@ -0,0 +1,47 @@
+import time
+
+import pytest
+
+from src.services.admission import AdmissionController, AdmissionTimeout, TokenBucket
+
+
+def test_bucket_refills_at_its_rate_up_to_capacity():
+    bucket = TokenBucket(60, capacity=10, level=0, updated=100.0)
+    bucket.refill(102.5)
+    assert bucket.level == pytest.approx(2.5)
+    assert bucket.wait_time(5) == pytest.approx(2.5)
+
+    bucket.refill(200.0)
+    assert bucket.level == 10
+    # More than the capacity only ever waits for a full bucket
+    assert bucket.wait_time(50) == 0
+
+
+def test_acquire_blocks_until_tokens_refill():
+    admission = AdmissionController(requests_per_minute=6000, tokens_per_minute=600)
+    admission.acquire(600)
+    with pytest.raises(AdmissionTimeout):
+        admission.acquire(5, timeout=0.1)
+
+    start = time.monotonic()
+    admission.acquire(5, timeout=2)
+    assert time.monotonic() - start >= 0.3
+    assert admission.stats()["admitted"] == 2
+    assert admission.stats()["rejected"] == 1
+
+
+def test_settled_usage_is_returned_to_the_bucket():
+    admission = AdmissionController(requests_per_minute=6000, tokens_per_minute=600)
+    admission.acquire(600)
+    admission.settle(600, 100)
+    admission.acquire(400, timeout=0.1)
+
+
+def test_processes_sharing_a_database_share_the_budget(tmp_path):
+    path = str(tmp_path / "admission.sqlite3")
+    first = AdmissionController(requests_per_minute=6000, tokens_per_minute=600, path=path)
+    second = AdmissionController(requests_per_minute=6000, tokens_per_minute=600, path=path)
+
+    first.acquire(600)
+    with pytest.raises(AdmissionTimeout):
+        second.acquire(5, timeout=0.1)
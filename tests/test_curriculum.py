@@ -0,0 +1,52 @@
+import pytest
+
+from src.services.curriculum import LearningPathGraph
+
+
+def assert_topological(path):
+    position = {title: i for i, title in enumerate(path.order())}
+    for prerequisite, title in path.graph.edges:
+        assert position[prerequisite] < position[title]
+
+
+@pytest.fixture
+def path():
+    return LearningPathGraph.from_topics(
+        [
+            {"title": "Vectors"},
+            {"title": "Matrices", "prerequisites": ["Vectors"]},
+            {"title": "Limits"},
+            {"title": "Derivatives", "prerequisites": ["Limits"]},
+        ]
+    )
+
+
+def test_prerequisite_that_would_create_a_cycle_is_rejected(path):
+    version = path.version
+    with pytest.raises(ValueError):
+        path.add_prerequisite("Vectors", "Matrices")
+    with pytest.raises(ValueError):
+        path.add_prerequisite("Limits", "Limits")
+
+    assert not path.graph.has_edge("Matrices", "Vectors")
+    assert path.version == version
+    assert path.order() == ["Vectors", "Matrices", "Limits", "Derivatives"]
+
+
+def test_backward_edge_reorders_only_the_affected_range(path):
+    path.add_prerequisite("Matrices", "Derivatives")
+
+    # Derivatives and its own prerequisite move ahead of Matrices; Vectors keeps its place
+    assert path.order() == ["Vectors", "Limits", "Derivatives", "Matrices"]
+    assert_topological(path)
+    assert path.levels() == {"Vectors": 0, "Matrices": 2, "Limits": 0, "Derivatives": 1}
+
+
+def test_order_stays_topological_as_the_graph_grows(path):
+    path.add_topic("Eigenvalues", prerequisites=["Matrices"])
+    path.add_prerequisite("Limits", "Vectors")
+    path.add_prerequisite("Eigenvalues", "Derivatives")
+
+    assert_topological(path)
+    assert path.levels()["Eigenvalues"] == 3
+    assert LearningPathGraph.from_dict(path.to_dict()).order() == path.order()
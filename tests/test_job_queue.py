@@ -0,0 +1,138 @@
+import pytest
+
+from src.services import job_queue
+from src.services.job_queue import PRIORITY_INTERACTIVE, PRIORITY_PREFETCH, JobFailed, JobQueue
+from src.services.metrics import set_trace_session
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"))
+
+
+def test_submit_claim_finish(queue):
+    job_id = queue.submit("slide", topic="Linear Algebra", subtopic="Vectors")
+    assert queue.poll(job_id) == ("pending", None)
+
+    claimed_id, kind, kwargs, session_id = queue.claim()
+    assert (claimed_id, kind, kwargs) == (job_id, "slide", {"topic": "Linear Algebra", "subtopic": "Vectors"})
+    assert session_id is None
+    assert queue.poll(job_id)[0] == "running"
+    assert queue.claim() is None
+
+    queue.finish(job_id, result={"title": "Vectors"})
+    assert queue.wait(job_id, timeout=1) == {"title": "Vectors"}
+
+
+def test_identical_submissions_share_a_job(queue):
+    first = queue.submit("slide", topic="Linear Algebra", subtopic="Vectors")
+    second = queue.submit("slide", subtopic="Vectors", topic="Linear Algebra")
+    assert first == second
+    assert queue.stats() == {"pending": 1}
+
+
+def test_failed_job_raises_and_is_retried_on_resubmit(queue):
+    job_id = queue.submit("slide", topic="Linear Algebra", subtopic="Vectors")
+    queue.claim()
+    queue.finish(job_id, error="upstream timeout")
+    with pytest.raises(JobFailed, match="upstream timeout"):
+        queue.wait(job_id, timeout=1)
+
+    assert queue.submit("slide", topic="Linear Algebra", subtopic="Vectors") == job_id
+    assert queue.poll(job_id) == ("pending", None)
+
+
+def test_unknown_kind_is_rejected(queue):
+    with pytest.raises(ValueError):
+        queue.submit("essay", topic="Linear Algebra")
+
+
+def test_job_of_a_crashed_worker_is_reclaimed(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    crashed = JobQueue(path)
+    job_id = crashed.submit("slide", topic="Linear Algebra", subtopic="Vectors")
+    # The worker claims the job and dies without finishing it
+    assert crashed.claim()[0] == job_id
+
+    # Still leased to the dead worker
+    assert JobQueue(path).claim() is None
+
+    survivor = JobQueue(path, lease_seconds=0)
+    assert survivor.claim()[0] == job_id
+    survivor.finish(job_id, result={"title": "Vectors"})
+    assert survivor.poll(job_id) == ("done", {"title": "Vectors"})
+
+
+def test_old_finished_jobs_are_pruned_on_claim(queue, monkeypatch):
+    monkeypatch.setattr(job_queue, "PRUNE_INTERVAL", 0)
+    old = queue.submit("slide", topic="Linear Algebra", subtopic="Vectors")
+    recent = queue.submit("slide", topic="Linear Algebra", subtopic="Matrices")
+    for job_id in (old, recent):
+        queue.claim()
+        queue.finish(job_id, result={"title": job_id})
+    queue._conn.execute("UPDATE jobs SET finished_at = 0 WHERE id = ?", (old,))
+
+    assert queue.claim() is None
+    assert queue.poll(old) == (None, None)
+    assert queue.poll(recent)[0] == "done"
+
+
+def test_interactive_jobs_are_claimed_before_prefetch(queue):
+    prefetch = [
+        queue.submit("slide", priority=PRIORITY_PREFETCH, topic="Statistics", subtopic=f"Slide {i}") for i in range(3)
+    ]
+    path = queue.submit("learning_path", topic="Linear Algebra", questions=[], answers=[], level=None)
+    clicked = queue.submit("slide", topic="Linear Algebra", subtopic="Vectors")
+
+    claimed = [queue.claim()[0] for _ in range(5)]
+    assert claimed == [path, clicked] + prefetch
+
+
+def test_claim_can_be_limited_to_interactive_jobs(queue):
+    queue.submit("slide", priority=PRIORITY_PREFETCH, topic="Statistics", subtopic="Mean")
+    assert queue.claim(max_priority=PRIORITY_INTERACTIVE) is None
+
+    path = queue.submit("learning_path", topic="Statistics", questions=[], answers=[], level=None)
+    assert queue.claim(max_priority=PRIORITY_INTERACTIVE)[0] == path
+
+
+def test_resubmitting_raises_the_priority_of_a_queued_job(queue):
+    first = queue.submit("slide", priority=PRIORITY_PREFETCH, topic="Statistics", subtopic="Mean")
+    requested = queue.submit("slide", priority=PRIORITY_PREFETCH, topic="Statistics", subtopic="Variance")
+    assert queue.submit("slide", priority=PRIORITY_INTERACTIVE, topic="Statistics", subtopic="Variance") == requested
+
+    # A later prefetch submission does not lower it again
+    queue.submit("slide", priority=PRIORITY_PREFETCH, topic="Statistics", subtopic="Variance")
+    assert [queue.claim()[0] for _ in range(2)] == [requested, first]
+
+
+def test_only_queued_prefetch_jobs_are_withdrawn(queue):
+    speculative = queue.submit("slide", priority=PRIORITY_PREFETCH, topic="Statistics", subtopic="Mean")
+    joined = queue.submit("slide", priority=PRIORITY_PREFETCH, topic="Statistics", subtopic="Variance")
+    queue.submit("slide", priority=PRIORITY_INTERACTIVE, topic="Statistics", subtopic="Variance")
+
+    queue.withdraw(speculative)
+    queue.withdraw(joined)
+    assert queue.poll(speculative) == (None, None)
+    assert queue.poll(joined) == ("pending", None)
+
+
+def test_submitting_session_travels_with_the_job(queue):
+    set_trace_session("0123456789abcdef0123456789abcdef")
+    try:
+        job_id = queue.submit("slide", topic="Linear Algebra", subtopic="Vectors")
+    finally:
+        set_trace_session(None)
+    assert queue.claim() == (
+        job_id,
+        "slide",
+        {"topic": "Linear Algebra", "subtopic": "Vectors"},
+        "0123456789abcdef0123456789abcdef",
+    )
+
+
+def test_worker_metrics_are_kept_per_parent(queue):
+    queue.publish_metrics(101, 1, {"histograms": {}, "counters": {"sensai_llm_hedges_total": [[[], 1]]}})
+    queue.publish_metrics(101, 1, {"histograms": {}, "counters": {"sensai_llm_hedges_total": [[[], 2]]}})
+    queue.publish_metrics(202, 2, {"histograms": {}, "counters": {}})
+    assert queue.worker_metrics(1) == [{"histograms": {}, "counters": {"sensai_llm_hedges_total": [[[], 2]]}}]
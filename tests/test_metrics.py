@@ -0,0 +1,39 @@
+import json
+
+from src.services.metrics import TOKEN_BUCKETS, MetricsRegistry
+
+
+def test_histograms_are_cumulative():
+    registry = MetricsRegistry()
+    registry.observe("sensai_parse_seconds", 0.02, stage="slides")
+    registry.observe("sensai_parse_seconds", 0.3, stage="slides")
+    text = registry.render()
+
+    assert 'sensai_parse_seconds_bucket{stage="slides",le="0.025"} 1' in text
+    assert 'sensai_parse_seconds_bucket{stage="slides",le="0.5"} 2' in text
+    assert 'sensai_parse_seconds_bucket{stage="slides",le="+Inf"} 2' in text
+    assert 'sensai_parse_seconds_count{stage="slides"} 2' in text
+
+
+def test_worker_snapshots_are_merged_into_the_render():
+    worker = MetricsRegistry()
+    worker.observe("sensai_llm_prompt_tokens", 100, TOKEN_BUCKETS, stage="slides", model="glm-4.5-air")
+    worker.increment("sensai_fallbacks_total", kind="slides")
+    # Snapshots cross the process boundary as JSON
+    snapshot = json.loads(json.dumps(worker.snapshot()))
+
+    parent = MetricsRegistry()
+    parent.increment("sensai_fallbacks_total", kind="slides")
+    parent.register_source(lambda: [snapshot])
+    text = parent.render()
+
+    assert 'sensai_fallbacks_total{kind="slides"} 2' in text
+    assert 'sensai_llm_prompt_tokens_count{model="glm-4.5-air",stage="slides"} 1' in text
+    # Merging happens per render and leaves the parent's own series alone
+    assert 'sensai_fallbacks_total{kind="slides"} 1' in parent._render()
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.increment("sensai_fallbacks_total", kind='say "hi"\n')
+    assert 'sensai_fallbacks_total{kind="say \\"hi\\"\\n"} 1' in registry.render()
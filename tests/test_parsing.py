@@ -0,0 +1,46 @@
+from src.utils.parsing import JsonArrayItemParser
+
+RESPONSE = '{"items": [{"title": "Vectors"}, {"title": "Matrices [2x2]"}]}'
+
+
+def feed_all(parser, chunks):
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    return items
+
+
+def test_items_in_one_chunk():
+    parser = JsonArrayItemParser()
+    assert parser.feed(RESPONSE) == [{"title": "Vectors"}, {"title": "Matrices [2x2]"}]
+    assert parser.complete
+
+
+def test_items_streamed_char_by_char():
+    parser = JsonArrayItemParser()
+    assert feed_all(parser, RESPONSE) == [{"title": "Vectors"}, {"title": "Matrices [2x2]"}]
+    assert parser.complete
+
+
+def test_prose_with_brackets_before_the_json():
+    text = 'Here are the [2] items you asked for, as "JSON":\n```json\n' + RESPONSE + "\n```"
+    parser = JsonArrayItemParser()
+    assert feed_all(parser, text) == [{"title": "Vectors"}, {"title": "Matrices [2x2]"}]
+    assert parser.complete
+
+
+def test_bare_array():
+    parser = JsonArrayItemParser()
+    assert parser.feed('[{"title": "Vectors"}]') == [{"title": "Vectors"}]
+    assert parser.complete
+
+
+def test_truncated_response_is_incomplete():
+    parser = JsonArrayItemParser()
+    assert parser.feed(RESPONSE[:40]) == [{"title": "Vectors"}]
+    assert not parser.complete
+
+
+def test_invalid_element_is_returned_as_none():
+    parser = JsonArrayItemParser()
+    assert parser.feed('{"items": [{"title": x}, {"title": "Vectors"}]}') == [None, {"title": "Vectors"}]
@@ -0,0 +1,46 @@
+import time
+
+import pytest
+
+from src.services.response_cache import ResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(path=str(tmp_path / "responses.sqlite3"), ttl=60, max_entries=2)
+
+
+def test_hit_and_miss(cache):
+    key = ResponseCache.make_key("glm-4.5-air", "Explain vectors", 0.7, 1500, False)
+    assert cache.get(key) is None
+    cache.set(key, "Vectors have a magnitude and a direction")
+    assert cache.get(key) == "Vectors have a magnitude and a direction"
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1}
+
+
+def test_every_request_parameter_is_part_of_the_key():
+    key = ResponseCache.make_key("glm-4.5-air", "Explain vectors", 0.7, 1500, False)
+    assert key != ResponseCache.make_key("glm-4.5-flash", "Explain vectors", 0.7, 1500, False)
+    assert key != ResponseCache.make_key("glm-4.5-air", "Explain vectors", 0.2, 1500, False)
+    assert key != ResponseCache.make_key("glm-4.5-air", "Explain vectors", 0.7, 1500, True)
+
+
+def test_entries_expire_after_the_ttl(cache, monkeypatch):
+    cache.set("key", "value")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(cache, monkeypatch):
+    now = time.time()
+    for offset, key in enumerate(["old", "used", "new"]):
+        monkeypatch.setattr(time, "time", lambda offset=offset: now + offset)
+        if key == "new":
+            cache.get("old")
+        cache.set(key, key)
+
+    assert cache.get("used") is None
+    assert cache.get("old") == "old"
+    assert cache.get("new") == "new"
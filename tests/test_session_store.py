@@ -0,0 +1,189 @@
+import socketserver
+import threading
+
+import pytest
+
+from src.services.session_store import (
+    RedisSessionBackend,
+    SessionStore,
+    SQLiteSessionBackend,
+    decode_session,
+    encode_session,
+)
+
+SESSION = {"current_page": "quiz", "topic": "Linear Algebra", "quiz_answers": [True, False, True]}
+
+
+class FakeRedis(socketserver.ThreadingTCPServer):
+    """Local stand-in speaking enough RESP for the session backend: AUTH, SELECT, GET, SET (with EX) and DEL"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, password=None):
+        super().__init__(("127.0.0.1", 0), FakeRedisHandler)
+        self.password = password
+        self.data = {}
+        self.expiry = {}
+        self.commands = []
+        self.connections = 0
+
+    @property
+    def url(self):
+        auth = f":{self.password}@" if self.password else ""
+        return f"redis://{auth}127.0.0.1:{self.server_address[1]}/1"
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.connections += 1
+        authenticated = self.server.password is None
+        while True:
+            command = self.read_command()
+            if command is None:
+                return
+            name = command[0].decode().upper()
+            self.server.commands.append(name)
+            if name == "AUTH":
+                authenticated = command[1].decode() == self.server.password
+                self.wfile.write(b"+OK\r\n" if authenticated else b"-ERR invalid password\r\n")
+            elif not authenticated:
+                self.wfile.write(b"-NOAUTH Authentication required\r\n")
+            elif name == "SELECT":
+                self.wfile.write(b"+OK\r\n")
+            elif name == "SET":
+                self.server.data[command[1]] = command[2]
+                if len(command) == 5 and command[3].upper() == b"EX":
+                    self.server.expiry[command[1]] = int(command[4])
+                self.wfile.write(b"+OK\r\n")
+            elif name == "GET":
+                value = self.server.data.get(command[1])
+                self.wfile.write(b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value))
+            elif name == "DEL":
+                removed = self.server.data.pop(command[1], None) is not None
+                self.wfile.write(b":%d\r\n" % removed)
+            else:
+                self.wfile.write(b"-ERR unknown command\r\n")
+
+    def read_command(self):
+        header = self.rfile.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+
+@pytest.fixture
+def redis_server():
+    server = FakeRedis(password="secret")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_encoding_round_trip():
+    assert decode_session(encode_session(SESSION)) == SESSION
+    large = {"quiz_questions": ["Have you used eigenvectors?"] * 100}
+    data = encode_session(large)
+    assert data[:1] == b"z"
+    assert decode_session(data) == large
+
+
+def test_redis_backend_round_trip(redis_server):
+    backend = RedisSessionBackend(redis_server.url)
+    assert backend.load("abc") is None
+
+    backend.save_many({"abc": b"payload"}, ttl=60)
+    assert backend.load("abc") == b"payload"
+    assert redis_server.data[b"sensai:session:abc"] == b"payload"
+    assert redis_server.expiry[b"sensai:session:abc"] == 60
+
+    backend.delete("abc")
+    assert backend.load("abc") is None
+    assert redis_server.commands[:2] == ["AUTH", "SELECT"]
+
+
+def test_redis_backend_reconnects_after_a_dropped_connection(redis_server):
+    backend = RedisSessionBackend(redis_server.url)
+    backend.save_many({"abc": b"payload"}, ttl=60)
+    # Simulate the server closing an idle connection
+    backend._socket.shutdown(2)
+
+    assert backend.load("abc") == b"payload"
+    assert redis_server.connections == 2
+
+
+def test_redis_backend_surfaces_server_errors(redis_server):
+    backend = RedisSessionBackend(redis_server.url)
+    redis_server.password = "rotated"
+    with pytest.raises(RuntimeError):
+        backend.load("abc")
+
+
+def test_session_restored_through_redis(redis_server):
+    writer = SessionStore(RedisSessionBackend(redis_server.url), flush_interval=0)
+    writer.save("abc", SESSION)
+    writer.flush()
+
+    # A fresh process (another replica, or after a restart) sees the session
+    reader = SessionStore(RedisSessionBackend(redis_server.url), flush_interval=0)
+    assert reader.load("abc") == SESSION
+
+
+def test_session_restored_through_sqlite(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    writer = SessionStore(SQLiteSessionBackend(path), flush_interval=0)
+    writer.save("abc", SESSION)
+    # Unflushed snapshots are visible to loads in the same process
+    assert writer.load("abc") == SESSION
+    writer.flush()
+
+    reader = SessionStore(SQLiteSessionBackend(path), flush_interval=0)
+    assert reader.load("abc") == SESSION
+    assert reader.load("missing") is None
+
+
+class RecordingBackend:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.writes = []
+        self.data = {}
+
+    def load(self, session_id):
+        return self.data.get(session_id)
+
+    def save_many(self, sessions, ttl):
+        if self.fail:
+            raise OSError("store unavailable")
+        self.writes.append(dict(sessions))
+        self.data.update(sessions)
+
+
+def test_unchanged_snapshots_are_not_rewritten():
+    backend = RecordingBackend()
+    store = SessionStore(backend, flush_interval=60)
+    store.save("abc", SESSION)
+    store.flush()
+    store.save("abc", SESSION)
+    store.flush()
+    store.save("abc", {**SESSION, "current_page": "learning_path"})
+    store.flush()
+
+    assert [list(write) for write in backend.writes] == [["abc"], ["abc"]]
+    assert store.load("abc")["current_page"] == "learning_path"
+
+
+def test_failed_flush_keeps_snapshots_for_the_next_one():
+    backend = RecordingBackend(fail=True)
+    store = SessionStore(backend, flush_interval=60)
+    store.save("abc", SESSION)
+    store.flush()
+    assert backend.writes == []
+
+    backend.fail = False
+    store.flush()
+    assert backend.writes == [{"abc": encode_session(SESSION)}]
@@ -0,0 +1,64 @@
+import threading
+import time
+
+import pytest
+
+from src.services.single_flight import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_run():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait(2)
+        return "result"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", slow))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while flight.shared < 4:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["result"] * 5
+    assert len(calls) == 1
+    assert flight.in_flight() == 0
+
+
+def test_errors_propagate_and_the_key_is_released():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("upstream")
+
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+    # A finished call is not reused
+    assert flight.do("key", lambda: "again") == "again"
+
+
+def test_streams_are_replayed_to_late_subscribers():
+    flight = SingleFlight()
+    release = threading.Event()
+    runs = []
+
+    def produce():
+        runs.append(1)
+        yield "a"
+        release.wait(2)
+        yield "b"
+
+    first = flight.stream("key", produce)
+    assert next(first) == "a"
+    second = flight.stream("key", produce)
+    release.set()
+
+    assert list(first) == ["b"]
+    assert list(second) == ["a", "b"]
+    assert len(runs) == 1
@@ -0,0 +1,55 @@
+import pytest
+
+from src.services.topic_index import TopicIndex, edit_distance, same_words
+
+NEAR_MISSES = [
+    ("Inorganic Chemistry", "Organic Chemistry"),
+    ("Microeconomics", "Macroeconomics"),
+    ("World War II", "World War I"),
+    ("Statics", "Statistics"),
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    return TopicIndex(path=tmp_path / "topics.sqlite3")
+
+
+def test_edit_distance():
+    assert edit_distance("learning", "learning") == 0
+    assert edit_distance("learnign", "learning") == 1
+    assert edit_distance("machin", "machine") == 1
+    assert edit_distance("statics", "statistics") == 3
+
+
+@pytest.mark.parametrize("new, known", NEAR_MISSES)
+def test_near_misses_are_different_words(new, known):
+    assert not same_words(new.casefold(), known.casefold())
+
+
+@pytest.mark.parametrize("new, known", NEAR_MISSES)
+def test_near_misses_are_neither_merged_nor_suggested(index, new, known):
+    assert index.canonicalize(known) == known
+    assert index.suggest(new) is None
+    assert index.canonicalize(new) == new
+    assert index.canonicalize(known) == known
+
+
+def test_typo_within_a_word_is_suggested_not_applied(index):
+    index.canonicalize("Large Language Models Explained")
+    assert index.suggest("Large Language Model Explained") == "Large Language Models Explained"
+    assert index.canonicalize("Large Language Model Explained") == "Large Language Model Explained"
+
+
+def test_aliases_and_normalized_spellings_are_canonicalized(index):
+    assert index.canonicalize("ML") == "Machine Learning"
+    assert index.canonicalize("  intro to machine   learning!") == "Machine Learning"
+    assert index.suggest("machine learning") is None
+
+
+def test_first_registration_wins_across_processes(tmp_path):
+    path = tmp_path / "topics.sqlite3"
+    first, second = TopicIndex(path=path), TopicIndex(path=path)
+
+    assert first.canonicalize("Quantum Field Theory") == "Quantum Field Theory"
+    assert second.canonicalize("QUANTUM FIELD THEORY") == "Quantum Field Theory"